@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the proof pipeline. Each module is runnable with
+`python -m benchmarks.<name>` from the repository root.
+"""
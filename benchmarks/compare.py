@@ -0,0 +1,74 @@
+"""
+Compares two result files of `python -m benchmarks.run`.
+
+    python -m benchmarks.compare baseline.json candidate.json --tolerance 0.1
+
+Prints turns/sec, stage times and peak RSS side by side for every corpus size
+both files contain. Exits with status 1 when the candidate's turns/sec drops
+by more than --tolerance (a fraction) at any size, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _change(baseline: float, candidate: float) -> str:
+    if not baseline:
+        return "n/a"
+    return f"{(candidate - baseline) / baseline:+.1%}"
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Prints the comparison and returns the sizes whose throughput regressed.
+    """
+    print(f"baseline:  {baseline.get('git', {}).get('commit')}  ({baseline.get('timestamp')})")
+    print(f"candidate: {candidate.get('git', {}).get('commit')}  ({candidate.get('timestamp')})")
+    if baseline.get("corpus") != candidate.get("corpus"):
+        print("warning: the corpus options differ between the runs")
+
+    regressions = []
+    for size, base in baseline.get("sizes", {}).items():
+        new = candidate.get("sizes", {}).get(size)
+        if new is None:
+            continue
+        print(f"\n{size} turns")
+        rows = [("turns/sec", base["turns_per_sec"], new["turns_per_sec"]),
+                ("model load s", base["model_load_s"], new["model_load_s"]),
+                ("peak RSS MB", base["peak_rss_mb"], new["peak_rss_mb"])]
+        for stage in sorted(set(base.get("stages", {})) | set(new.get("stages", {}))):
+            rows.append((f"{stage} s", base.get("stages", {}).get(stage, 0.0), new.get("stages", {}).get(stage, 0.0)))
+        for name, old_value, new_value in rows:
+            print(f"  {name:<14} {old_value:>12.3f} {new_value:>12.3f} {_change(old_value, new_value):>9}")
+        if base["turns_per_sec"] and new["turns_per_sec"] < base["turns_per_sec"] * (1 - tolerance):
+            regressions.append(size)
+
+    for name in ("import_s", "cli_no_input_s"):
+        old_value = baseline.get("cold_start", {}).get(name, {}).get("median")
+        new_value = candidate.get("cold_start", {}).get(name, {}).get("median")
+        if old_value is not None and new_value is not None:
+            print(f"\ncold start {name}: {old_value:.3f} -> {new_value:.3f} ({_change(old_value, new_value)})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative turns/sec drop")
+    args = parser.parse_args()
+
+    regressions = compare(_load(args.baseline), _load(args.candidate), args.tolerance)
+    if regressions:
+        print(f"\nThroughput regressed by more than {args.tolerance:.0%} at: {', '.join(regressions)} turns")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
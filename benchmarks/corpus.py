@@ -0,0 +1,215 @@
+"""
+Seeded generator of synthetic multilingual user/bot conversations.
+
+The same seed and parameters always produce the same corpus, so benchmark
+results from different commits are comparable. Knobs:
+
+  - languages:            mix of Bengali, Hindi, English, Tamil and romanized
+                          Hindi-English code-mixing ("hinglish")
+  - duplicate_rate:       share of turns that exactly repeat an earlier turn
+  - near_duplicate_rate:  share of turns that repeat an earlier turn with a
+                          couple of words replaced
+  - pii_rate:             share of turns with an e-mail address or phone number
+  - mean_words / length_sigma:  log-normal word count of the bot answer; the
+                          user prompt is about a third as long
+
+Usage:
+    python -m benchmarks.corpus --turns 10000 --seed 7 --output corpus.json
+"""
+import argparse
+import json
+import math
+import random
+from typing import Any, Dict, List, Sequence
+
+LANGUAGES = {
+    "bn": {
+        "words": (
+            "আমি আপনি তিনি আমরা শহর গ্রাম নদী বাজার স্কুল বই খাবার ভাত মাছ বৃষ্টি রোদ আকাশ "
+            "পরিবার বন্ধু কাজ অফিস ট্রেন বাস রাস্তা হাসপাতাল ডাক্তার ওষুধ শিক্ষক ছাত্র পরীক্ষা "
+            "ইতিহাস বিজ্ঞান গান কবিতা উৎসব পূজা মন্দির মসজিদ বাগান ফুল গাছ পাখি সকাল সন্ধ্যা রাত "
+            "সুন্দর বড় ছোট নতুন পুরনো জনপ্রিয় ঐতিহাসিক বিখ্যাত সহজ কঠিন দরকারি"
+        ).split(),
+        "connectors": "এবং কিন্তু তাই কারণ যেমন অথবা যদি তবে".split(),
+        "questions": ["{topic} সম্পর্কে কিছু বলতে পারেন?", "{topic} কী?", "কীভাবে {topic} শিখব?"],
+        "end": "।",
+    },
+    "hi": {
+        "words": (
+            "मैं आप वह हम शहर गाँव नदी बाज़ार स्कूल किताब खाना चावल मछली बारिश धूप आसमान "
+            "परिवार दोस्त काम दफ़्तर ट्रेन बस सड़क अस्पताल डॉक्टर दवा शिक्षक छात्र परीक्षा "
+            "इतिहास विज्ञान गीत कविता त्योहार पूजा मंदिर मस्जिद बगीचा फूल पेड़ पक्षी सुबह शाम रात "
+            "सुंदर बड़ा छोटा नया पुराना लोकप्रिय ऐतिहासिक प्रसिद्ध आसान कठिन ज़रूरी"
+        ).split(),
+        "connectors": "और लेकिन इसलिए क्योंकि जैसे या अगर तो".split(),
+        "questions": ["क्या आप {topic} के बारे में बता सकते हैं?", "{topic} क्या है?", "{topic} कैसे सीखें?"],
+        "end": "।",
+    },
+    "en": {
+        "words": (
+            "city village river market school book food rice fish rain sunshine sky family "
+            "friend work office train bus road hospital doctor medicine teacher student exam "
+            "history science song poem festival temple mosque garden flower tree bird morning "
+            "evening night beautiful large small new old popular historic famous easy difficult "
+            "important weather travel ticket museum language culture"
+        ).split(),
+        "connectors": "and but so because like or if then".split(),
+        "questions": ["Can you tell me about {topic}?", "What is {topic}?", "How do I learn about {topic}?"],
+        "end": ".",
+    },
+    "ta": {
+        "words": (
+            "நான் நீங்கள் அவர் நாங்கள் நகரம் கிராமம் நதி சந்தை பள்ளி புத்தகம் உணவு சாதம் மீன் மழை "
+            "வெயில் வானம் குடும்பம் நண்பர் வேலை அலுவலகம் ரயில் பேருந்து சாலை மருத்துவமனை மருத்துவர் "
+            "ஆசிரியர் மாணவர் தேர்வு வரலாறு அறிவியல் பாடல் கவிதை திருவிழா கோயில் தோட்டம் பூ மரம் "
+            "பறவை காலை மாலை இரவு அழகான பெரிய சிறிய புதிய பழைய பிரபலமான எளிய கடினமான"
+        ).split(),
+        "connectors": "மற்றும் ஆனால் எனவே ஏனெனில் போல அல்லது".split(),
+        "questions": ["{topic} பற்றி சொல்ல முடியுமா?", "{topic} என்றால் என்ன?", "{topic} எப்படி கற்றுக்கொள்வது?"],
+        "end": ".",
+    },
+    "hinglish": {
+        "words": (
+            "main aap woh hum shehar gaon nadi bazaar school kitaab khana chawal machli baarish "
+            "dhoop family dost kaam office train bus sadak hospital doctor dawai teacher student "
+            "exam history science gaana kavita tyohaar mandir garden phool ped subah shaam raat "
+            "sundar bada chhota naya purana popular famous easy mushkil zaroori weather ticket"
+        ).split(),
+        "connectors": "aur lekin isliye kyunki jaise ya agar toh".split(),
+        "questions": ["Kya aap {topic} ke baare mein bata sakte ho?", "{topic} kya hai?", "{topic} kaise seekhein?"],
+        "end": ".",
+    },
+}
+DEFAULT_LANGUAGES = ("bn", "hi", "en")
+EMAIL_DOMAINS = ("example.com", "mail.example.org", "test.example.in")
+
+
+def _sentence(rng: random.Random, language: Dict[str, Any], words: int) -> str:
+    tokens = []
+    for position in range(max(words, 1)):
+        if position and rng.random() < 0.12:
+            tokens.append(rng.choice(language["connectors"]))
+        else:
+            tokens.append(rng.choice(language["words"]))
+    return " ".join(tokens) + language["end"]
+
+
+def _text(rng: random.Random, language: Dict[str, Any], words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 16))
+        sentences.append(_sentence(rng, language, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def _pii(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return f"user{rng.randint(1, 99999)}@{rng.choice(EMAIL_DOMAINS)}"
+    return f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}"
+
+
+def _near_copy(rng: random.Random, turn: Dict[str, str], language: Dict[str, Any]) -> Dict[str, str]:
+    words = turn["bot"].split(" ")
+    for _ in range(min(2, len(words))):
+        words[rng.randrange(len(words))] = rng.choice(language["words"])
+    return {"user": turn["user"], "bot": " ".join(words)}
+
+
+def generate_corpus(turns: int, seed: int = 0, languages: Sequence[str] = DEFAULT_LANGUAGES,
+                    duplicate_rate: float = 0.05, near_duplicate_rate: float = 0.0, pii_rate: float = 0.02,
+                    mean_words: float = 60.0, length_sigma: float = 0.6) -> List[Dict[str, str]]:
+    """
+    Returns `turns` user/bot dicts. Identical arguments give an identical corpus.
+    """
+    unknown = [code for code in languages if code not in LANGUAGES]
+    if unknown:
+        raise ValueError(f"Unknown languages {unknown}; choose from {sorted(LANGUAGES)}")
+    rng = random.Random(seed)
+    # Log-normal with the requested mean: mu = ln(mean) - sigma^2 / 2
+    mu = math.log(max(mean_words, 1.0)) - length_sigma ** 2 / 2
+    corpus: List[Dict[str, str]] = []
+    turn_languages: List[str] = []
+    for _ in range(turns):
+        roll = rng.random()
+        if corpus and roll < duplicate_rate:
+            source = rng.randrange(len(corpus))
+            corpus.append(dict(corpus[source]))
+            turn_languages.append(turn_languages[source])
+            continue
+        if corpus and roll < duplicate_rate + near_duplicate_rate:
+            source = rng.randrange(len(corpus))
+            corpus.append(_near_copy(rng, corpus[source], LANGUAGES[turn_languages[source]]))
+            turn_languages.append(turn_languages[source])
+            continue
+
+        code = rng.choice(languages)
+        language = LANGUAGES[code]
+        bot_words = max(1, int(rng.lognormvariate(mu, length_sigma)))
+        topic = " ".join(rng.choice(language["words"]) for _ in range(rng.randint(1, 3)))
+        user = rng.choice(language["questions"]).format(topic=topic)
+        extra_user_words = max(0, bot_words // 3 - len(user.split()))
+        if extra_user_words:
+            user = _text(rng, language, extra_user_words) + " " + user
+        bot = _text(rng, language, bot_words)
+        if rng.random() < pii_rate:
+            if rng.random() < 0.5:
+                user = f"{user} {_pii(rng)}"
+            else:
+                bot = f"{bot} {_pii(rng)}"
+        corpus.append({"user": user, "bot": bot})
+        turn_languages.append(code)
+    return corpus
+
+
+def write_corpus(path: str, corpus: List[Dict[str, str]], tee_format: bool = False) -> None:
+    """
+    Writes a plain list of turns, or a TEE request with prompt/answer keys.
+    """
+    if tee_format:
+        payload: Any = {
+            "job_id": "benchmark", "file_id": "benchmark", "nonce": "benchmark",
+            "conversations": [{"prompt": turn["user"], "answer": turn["bot"]} for turn in corpus],
+            "uniqueness_hashes": [],
+        }
+    else:
+        payload = corpus
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--languages", default=",".join(DEFAULT_LANGUAGES),
+                        help=f"Comma-separated subset of {','.join(LANGUAGES)}")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--pii-rate", type=float, default=0.02)
+    parser.add_argument("--mean-words", type=float, default=60.0, help="Mean bot answer length in words")
+    parser.add_argument("--length-sigma", type=float, default=0.6, help="Log-normal spread of the lengths")
+
+
+def corpus_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "seed": args.seed,
+        "languages": [code for code in args.languages.split(",") if code],
+        "duplicate_rate": args.duplicate_rate,
+        "near_duplicate_rate": args.near_duplicate_rate,
+        "pii_rate": args.pii_rate,
+        "mean_words": args.mean_words,
+        "length_sigma": args.length_sigma,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--tee-format", action="store_true", help="Write a TEE request instead of a list")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    write_corpus(args.output, generate_corpus(args.turns, **corpus_options(args)), tee_format=args.tee_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+PII detection on pathological input: the original two-regex check against
+`PiiScanner`.
+
+The original e-mail pattern starts with `[a-zA-Z0-9_.+-]+@`, so a long run of
+such characters without an `@` is re-scanned from every start position
+(quadratic time). Each case is checked for identical results before timing.
+
+Usage:
+    python -m benchmarks.pii --sizes 1000 10000 100000 --output pii.json
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List
+
+from my_proof.pii import PiiScanner
+
+LEGACY_EMAIL = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+LEGACY_PHONE = re.compile(r"(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?[\d\s-]{7,10}")
+
+
+def legacy_contains_pii(text: str) -> bool:
+    return bool(LEGACY_EMAIL.search(text) or LEGACY_PHONE.search(text))
+
+
+CASES: Dict[str, Callable[[int], str]] = {
+    # One long token of e-mail characters and no "@"
+    "alnum_run": lambda n: "a1_." * (n // 4),
+    # A numeric table whose cells never give seven digits/spaces in a row
+    "numeric_table": lambda n: "12.34|56.7(8)|+9." * (n // 17),
+    # Almost-addresses: every "@" is followed by a domain without a dot
+    "at_signs": lambda n: "user@host-name " * (n // 15),
+    # Ordinary prose, the common case
+    "prose": lambda n: "ভাষা মডেল এবং মানুষ কথা বলে। Language models talk. " * (n // 50),
+}
+# Cases the legacy regexes take quadratic time on
+QUADRATIC_FOR_LEGACY = {"alnum_run"}
+
+
+def _best_of(function: Callable[[str], Any], text: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes: List[int], repeats: int = 3, legacy_limit: int = 20_000) -> Dict[str, Any]:
+    scanner = PiiScanner()
+    results: Dict[str, Any] = {}
+    for name, build in CASES.items():
+        for size in sizes:
+            text = build(size)
+            row = {
+                "chars": len(text),
+                "scanner_contains_s": _best_of(scanner.contains_pii, text, repeats),
+                "scanner_categories_s": _best_of(scanner.find_categories, text, repeats),
+            }
+            if scanner.contains_pii(text) != bool(scanner.find_categories(text)):
+                raise AssertionError(f"{name}: contains_pii and find_categories disagree")
+            # Skip the sizes the legacy check would take minutes on
+            if len(text) <= legacy_limit or name not in QUADRATIC_FOR_LEGACY:
+                if legacy_contains_pii(text) != scanner.contains_pii(text):
+                    raise AssertionError(f"{name}: scanner and legacy regexes disagree")
+                row["legacy_s"] = _best_of(legacy_contains_pii, text, repeats)
+            results[f"{name}/{size}"] = row
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--legacy-limit", type=int, default=20_000,
+                        help="Largest text the legacy regexes are timed on in quadratic cases")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.sizes, args.repeats, args.legacy_limit), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
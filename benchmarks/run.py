@@ -0,0 +1,155 @@
+"""
+Throughput benchmark for `RegionalLanguageProof.generate_proof` on generated
+corpora (see benchmarks.corpus).
+
+Each corpus size is scored in a fresh interpreter so that peak RSS belongs to
+that run alone. Reported per size, as the median over --runs:
+
+  - turns_per_sec:    turns / proof wall time (model load excluded)
+  - stages:           seconds spent in lexical scoring (PII, tokenization,
+                      complexity, SimHash), in quality scoring (embedding)
+                      and in the rest (parsing, validation, aggregation)
+  - model_load_s:     loading the embedding backend
+  - peak_rss_mb:      peak resident set size of the scoring process
+
+With SCORING_WORKERS > 1 the lexical stage runs in the worker processes and
+is not reported separately. The CLI cold start from benchmarks.startup is
+included unless --skip-cold-start is given. Results are written as JSON
+together with the git commit, so runs can be compared with
+`python -m benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.run --turns 1000 10000 --output results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from .corpus import add_corpus_arguments, corpus_options, generate_corpus, write_corpus
+from .startup import REPO_ROOT, run as run_startup
+
+PROOF_PROBE = """
+import json, resource, sys, time
+from my_proof.proof import RegionalLanguageProof
+from my_proof.scorer import ChatScorer
+
+path, turns = sys.argv[1], int(sys.argv[2])
+scorer = ChatScorer()
+started = time.perf_counter()
+scorer.backend
+model_load_s = time.perf_counter() - started
+
+stages = {"lexical": 0.0, "quality": 0.0}
+def timed(stage, method):
+    def wrapper(*args, **kwargs):
+        began = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stages[stage] += time.perf_counter() - began
+    return wrapper
+scorer.score_lexical_batch = timed("lexical", scorer.score_lexical_batch)
+scorer.calculate_quality_batch = timed("quality", scorer.calculate_quality_batch)
+
+started = time.perf_counter()
+proof = RegionalLanguageProof(config={}, data_file_path=path, scorer=scorer).generate_proof()
+total_s = time.perf_counter() - started
+stages["other"] = max(0.0, total_s - stages["lexical"] - stages["quality"])
+
+# ru_maxrss is in KiB on Linux and in bytes on macOS
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+print(json.dumps({
+    "total_s": total_s,
+    "turns_per_sec": turns / total_s if total_s > 0 else None,
+    "model_load_s": model_load_s,
+    "stages": stages,
+    "peak_rss_mb": peak_rss_mb,
+    "valid": proof.valid,
+    "score": proof.score,
+    "error": proof.attributes.get("error"),
+}))
+"""
+
+
+def _git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def _settings_snapshot() -> Dict[str, Any]:
+    from my_proof.config import settings
+    return settings.model_dump()
+
+
+def _score_corpus(path: str, turns: int) -> Dict[str, Any]:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-c", PROOF_PROBE, path, str(turns)],
+                            capture_output=True, text=True, env=env, check=True)
+    # Package logging goes to stderr; the probe prints its measurement as the last stdout line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median_run(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    median = sorted(samples, key=lambda sample: sample["total_s"])[len(samples) // 2]
+    summary = dict(median)
+    summary["turns_per_sec_samples"] = [sample["turns_per_sec"] for sample in samples]
+    summary["peak_rss_mb"] = max(sample["peak_rss_mb"] for sample in samples)
+    return summary
+
+
+def run(sizes: List[int], options: Dict[str, Any], runs: int = 3, cold_start_runs: int = 3) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": _settings_snapshot(),
+        "corpus": options,
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for turns in sizes:
+            path = os.path.join(tmp_dir, f"corpus_{turns}.json")
+            write_corpus(path, generate_corpus(turns, **options))
+            samples = [_score_corpus(path, turns) for _ in range(runs)]
+            results["sizes"][str(turns)] = _median_run(samples)
+            if results["sizes"][str(turns)]["error"]:
+                # An error proof stops early, so its timings say nothing about throughput
+                print(f"warning: {turns} turns produced an error proof: {results['sizes'][str(turns)]['error']}",
+                      file=sys.stderr)
+            print(f"{turns} turns: {results['sizes'][str(turns)]['turns_per_sec']:.1f} turns/sec", file=sys.stderr)
+    if cold_start_runs:
+        results["cold_start"] = run_startup(cold_start_runs, include_model=False)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[1000], help="Corpus sizes to score")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per size; the median is reported")
+    parser.add_argument("--cold-start-runs", type=int, default=3)
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args.turns, corpus_options(args), runs=args.runs,
+                  cold_start_runs=0 if args.skip_cold_start else args.cold_start_runs)
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start benchmark for the proof CLI.
+
+Every measurement runs in a fresh interpreter so import caches and the loaded
+model never carry over between samples:
+
+  - import_s:        `import my_proof.proof`
+  - cli_no_input_s:  wall time of `python -m my_proof` on the no-input error path
+  - model_load_s:    first access of `ChatScorer.backend`
+  - first_turn_s:    scoring one turn (lexical + quality) right after the load
+
+Usage:
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, time
+started = time.perf_counter()
+import my_proof.proof
+print(json.dumps({"import_s": time.perf_counter() - started}))
+"""
+
+MODEL_PROBE = """
+import json, time
+from my_proof.models_llm import ChatTurn
+from my_proof.scorer import ChatScorer
+scorer = ChatScorer()
+started = time.perf_counter()
+scorer.backend
+loaded = time.perf_counter()
+turn = ChatTurn(user="What is the capital of India?", bot="New Delhi is the capital of India.")
+scorer.score_lexical(turn)
+scorer.calculate_quality(turn)
+print(json.dumps({"model_load_s": loaded - started, "first_turn_s": time.perf_counter() - loaded}))
+"""
+
+
+def _run_probe(code: str) -> Dict[str, float]:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    # Package logging goes to stderr; the probe prints its measurement as the last stdout line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _time_cli_no_input() -> float:
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory() as empty_dir:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "my_proof"], cwd=empty_dir, env=env,
+                       stdin=subprocess.DEVNULL, capture_output=True, check=True)
+        return time.perf_counter() - started
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    return {"min": min(samples), "median": statistics.median(samples), "max": max(samples)}
+
+
+def run(runs: int, include_model: bool = True) -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {"import_s": [], "cli_no_input_s": []}
+    for _ in range(runs):
+        samples["import_s"].append(_run_probe(IMPORT_PROBE)["import_s"])
+        samples["cli_no_input_s"].append(_time_cli_no_input())
+        if include_model:
+            for name, value in _run_probe(MODEL_PROBE).items():
+                samples.setdefault(name, []).append(value)
+    return {name: _summarize(values) for name, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-model", action="store_true", help="Only measure import and CLI start-up")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.runs, include_model=not args.skip_model)
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
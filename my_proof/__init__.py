@@ -2,10 +2,11 @@ import logging
 import sys
 
 # --- Basic Logging Setup ---
-# Configure logging to print to standard output.
+# Configure logging to print to standard error, so stdout carries only the
+# proof JSON (or the JSONL of batch mode).
 # In a containerized environment, logs are typically collected from stdout/stderr.
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
-    stream=sys.stdout,
+    stream=sys.stderr,
 )
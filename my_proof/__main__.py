@@ -2,9 +2,11 @@ import json
 import logging
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO, Optional
 
-from my_proof.proof import RegionalLanguageProof
+import ijson
+
+from my_proof.request_stream import ConversationStream
 
 INPUT_DIR = "./input"
 OUTPUT_DIR = "output"
@@ -21,6 +23,22 @@ def load_config() -> Dict[str, Any]:
     logging.info(f"Using config: {json.dumps(config, indent=2)}")
     return config
 
+def open_stdin_payload() -> Optional[BinaryIO]:
+    """
+    Returns the binary stdin stream positioned at the first non-whitespace
+    byte, or None when stdin carries no payload. Nothing is read past that byte.
+    """
+    stream = getattr(sys.stdin, "buffer", None)
+    if stream is None:
+        return None
+    while True:
+        head = stream.peek(1)[:1]
+        if not head:
+            return None
+        if not head.isspace():
+            return stream
+        stream.read(1)
+
 def main():
     """
     Main entrypoint for the proof generation process.
@@ -33,45 +51,25 @@ def main():
     # Keeping the output directory creation is unnecessary now, but harmless if left.
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Try to read from stdin first (TEE request format)
-    input_data = None
-    uniqueness_hashes = []
-    
+    final_proof = None
+
+    # Try to read from stdin first (TEE request format). The request is parsed
+    # incrementally and scored as it streams in; nothing is written to disk.
     try:
-        # Read from stdin for TEE environment
-        stdin_input = sys.stdin.read().strip()
-        if stdin_input:
-            request_data = json.loads(stdin_input)
-            logging.info("Processing TEE request format")
-            
-            # Extract conversation data and uniqueness hashes from request
-            conversations = request_data.get("conversations", [])
-            uniqueness_hashes = request_data.get("uniqueness_hashes", [])
-            
-            # Convert prompt/answer format to user/bot format for internal processing
-            input_data = []
-            for conv in conversations:
-                input_data.append({
-                    "user": conv.get("prompt", ""),
-                    "bot": conv.get("answer", "")
-                })
-            
-            # Update config with request parameters
-            if "job_id" in request_data:
-                config["job_id"] = request_data["job_id"]
-            if "file_id" in request_data:
-                config["file_id"] = request_data["file_id"]
-            if "nonce" in request_data:
-                config["nonce"] = request_data["nonce"]
-            
-            logging.info(f"Processed {len(input_data)} conversations from TEE request")
-            logging.info(f"Received {len(uniqueness_hashes)} uniqueness hashes")
-                
-    except (json.JSONDecodeError, Exception) as e:
+        stdin_stream = open_stdin_payload()
+        if stdin_stream is not None:
+            request = ConversationStream(stdin_stream, tee_format=True)
+            if request.has_conversations():
+                logging.info("Processing TEE request format")
+                from my_proof.proof import generate_proof_from_stream
+                final_proof = generate_proof_from_stream(config, request)
+            else:
+                logging.info("No conversations in stdin input, trying file input")
+    except (ijson.JSONError, OSError, ValueError) as e:
         logging.info(f"No valid stdin input, trying file input: {e}")
-    
+
     # Fallback to file input if stdin didn't work
-    if not input_data:
+    if final_proof is None:
         input_file_path = os.path.join(INPUT_DIR, "data.json")
         
         if not os.path.exists(input_file_path):
@@ -89,39 +87,17 @@ def main():
             print(json.dumps(error_proof))
             return
 
-        # Initialize and run the proof generation from file
-        with open(input_file_path, 'r') as f:
-            file_data = json.load(f)
-            if isinstance(file_data, list):
-                input_data = file_data
-            else:
-                input_data = file_data.get("conversations", [])
-                uniqueness_hashes = file_data.get("uniqueness_hashes", [])
-        
-        logging.info(f"Loaded {len(input_data)} conversations from file")
+        # Initialize and run the proof generation from file. The scorer stack is
+        # imported only now, so the no-input error path above stays fast.
+        from my_proof.proof import generate_proof_from_stream
+        with open(input_file_path, "rb") as f:
+            final_proof = generate_proof_from_stream(config, ConversationStream(f))
 
-    # Create a temporary file for the proof generator if we got data from stdin
-    if 'input_file_path' not in locals():
-        temp_file_path = os.path.join(INPUT_DIR, "temp_data.json")
-        os.makedirs(INPUT_DIR, exist_ok=True)
-        with open(temp_file_path, 'w') as f:
-            json.dump(input_data, f, indent=2)
-        input_file_path = temp_file_path
-    
-    proof_generator = RegionalLanguageProof(data_file_path=input_file_path, config=config, uniqueness_hashes=uniqueness_hashes)
-    final_proof = proof_generator.generate_proof()
-
-    print(final_proof.model_dump_json())
+    from my_proof.hash_codec import proof_json
+    print(proof_json(final_proof))
 
     logging.info("Proof successfully generated and printed to STDOUT")
     logging.info(f"Final proof summary: Valid={final_proof.valid}, Score={final_proof.score:.3f}, Quality={final_proof.quality:.3f}, Uniqueness={final_proof.uniqueness:.3f}")
-    
-    # Clean up temporary file if created
-    if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-        os.remove(temp_file_path)
-        logging.info("Cleaned up temporary data file")
 
 if __name__ == "__main__":
     main()
-
-    
\ No newline at end of file
@@ -0,0 +1,206 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .hash_codec import decode_fingerprints, encode_fingerprints
+from .near_duplicates import HammingIndex
+from .scorer import LexicalScores
+
+
+class FingerprintSet:
+    """
+    Set of 64-bit fingerprints stored as a sorted uint64 array (8 bytes per
+    value) plus a small Python set of recent additions. The buffer is merged
+    into the array once it holds `merge_threshold` values or an eighth of the
+    array, whichever is larger, which keeps merges rare as the set grows.
+
+    `add` only buffers the value. `add_new` also reports whether the value
+    is new, which costs a binary search per call.
+    """
+    def __init__(self, merge_threshold: int = 65_536):
+        self.merge_threshold = merge_threshold
+        self._sorted = np.zeros(0, dtype=np.uint64)
+        self._recent = set()
+        self._limit = merge_threshold
+
+    def __len__(self) -> int:
+        # `add` may buffer values the array already holds; merging dedups them
+        self._merge()
+        return len(self._sorted)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        if fingerprint in self._recent:
+            return True
+        position = int(np.searchsorted(self._sorted, np.uint64(fingerprint)))
+        return position < len(self._sorted) and int(self._sorted[position]) == fingerprint
+
+    def add(self, fingerprint: int) -> None:
+        self._recent.add(fingerprint)
+        if len(self._recent) >= self._limit:
+            self._merge()
+
+    def add_new(self, fingerprint: int) -> bool:
+        """
+        Adds a fingerprint, returning False if it was already present.
+        """
+        if fingerprint in self:
+            return False
+        self.add(fingerprint)
+        return True
+
+    def to_array(self) -> np.ndarray:
+        """The fingerprints as a sorted uint64 array."""
+        self._merge()
+        return self._sorted
+
+    @classmethod
+    def from_array(cls, fingerprints: np.ndarray) -> "FingerprintSet":
+        """A set holding `fingerprints`, which must be sorted and unique."""
+        restored = cls()
+        restored._sorted = fingerprints.astype(np.uint64)
+        restored._limit = max(restored.merge_threshold, len(restored._sorted) // 8)
+        return restored
+
+    def _merge(self) -> None:
+        if self._recent:
+            recent = np.sort(np.fromiter(self._recent, dtype=np.uint64, count=len(self._recent)))
+            positions = np.searchsorted(self._sorted, recent)
+            known = positions < len(self._sorted)
+            known[known] = self._sorted[positions[known]] == recent[known]
+            # Two sorted runs: the stable sort (timsort) merges them in linear time
+            self._sorted = np.sort(np.concatenate([self._sorted, recent[~known]]), kind="stable")
+            self._recent = set()
+            self._limit = max(self.merge_threshold, len(self._sorted) // 8)
+
+
+class TurnDetails:
+    """
+    Struct-of-arrays record of the passing turns, kept only when per-turn
+    details are requested (INCLUDE_TURN_DETAILS).
+    """
+    __slots__ = ("conversation_index", "complexity_score", "quality_score", "uniqueness_hash")
+
+    def __init__(self):
+        self.conversation_index = array("q")
+        self.complexity_score = array("d")
+        self.quality_score = array("d")
+        self.uniqueness_hash = array("Q")
+
+    def append(self, index: int, complexity: float, quality: float, fingerprint: int) -> None:
+        self.conversation_index.append(index)
+        self.complexity_score.append(complexity)
+        self.quality_score.append(quality)
+        self.uniqueness_hash.append(fingerprint)
+
+    def to_dict(self) -> Dict[str, List]:
+        return {
+            "conversation_index": self.conversation_index.tolist(),
+            "complexity_score": self.complexity_score.tolist(),
+            "quality_score": self.quality_score.tolist(),
+            "uniqueness_hash": [str(fp) for fp in self.uniqueness_hash],
+        }
+
+    @classmethod
+    def from_dict(cls, details: Dict[str, List]) -> "TurnDetails":
+        restored = cls()
+        restored.conversation_index.extend(details["conversation_index"])
+        restored.complexity_score.extend(details["complexity_score"])
+        restored.quality_score.extend(details["quality_score"])
+        restored.uniqueness_hash.extend(int(fp) for fp in details["uniqueness_hash"])
+        return restored
+
+
+class ProofAggregator:
+    """
+    Running aggregates of a proof, updated one scored turn at a time. Memory
+    stays constant per turn except for the fingerprints (8 bytes per unique
+    value) and, when enabled, the near-duplicate index and turn details.
+    """
+    def __init__(self, pii_categories: Iterable[str] = (), near_duplicate_index: Optional[HammingIndex] = None,
+                 include_turn_details: bool = False):
+        self.fingerprints = FingerprintSet()
+        self.near_duplicate_index = near_duplicate_index
+        self.turn_details = TurnDetails() if include_turn_details else None
+        self.pii_category_counts = {category: 0 for category in pii_categories}
+        self.turn_count = 0
+        self.word_count_score_sum = 0.0
+        self.near_duplicates = 0
+        self.valid_count = 0
+        self.quality_sum = 0.0
+
+    def add_turn(self, lexical: LexicalScores) -> None:
+        """
+        Accounts for a turn whether or not it passes: word count, PII and uniqueness.
+        """
+        self.turn_count += 1
+        self.word_count_score_sum += lexical.word_count_score
+        for category in lexical.pii_categories:
+            self.pii_category_counts[category] += 1
+
+        fingerprint = lexical.fingerprint
+        if self.near_duplicate_index is None:
+            self.fingerprints.add(fingerprint)
+        elif self.fingerprints.add_new(fingerprint):
+            # A new fingerprint may still be a lightly edited copy of an earlier turn
+            if self.near_duplicate_index.find(fingerprint) is not None:
+                self.near_duplicates += 1
+            self.near_duplicate_index.add(fingerprint)
+
+    def add_valid(self, index: int, lexical: LexicalScores, quality: float) -> None:
+        """
+        Accounts for a turn that passed every check.
+        """
+        self.valid_count += 1
+        self.quality_sum += quality
+        if self.turn_details is not None:
+            self.turn_details.append(index, lexical.complexity, quality, lexical.fingerprint)
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        The running totals as a JSON-serializable dict (see `restore`).
+        """
+        return {
+            "turn_count": self.turn_count,
+            "word_count_score_sum": self.word_count_score_sum,
+            "near_duplicates": self.near_duplicates,
+            "valid_count": self.valid_count,
+            "quality_sum": self.quality_sum,
+            "pii_category_counts": self.pii_category_counts,
+            "fingerprints": encode_fingerprints(self.fingerprints.to_array()),
+            "turn_details": self.turn_details.to_dict() if self.turn_details is not None else None,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Continues from totals saved by `to_state`, so that adding the remaining
+        turns gives the same aggregates as adding every turn to a fresh instance.
+        """
+        self.turn_count = state["turn_count"]
+        self.word_count_score_sum = state["word_count_score_sum"]
+        self.near_duplicates = state["near_duplicates"]
+        self.valid_count = state["valid_count"]
+        self.quality_sum = state["quality_sum"]
+        for category, count in state["pii_category_counts"].items():
+            if category in self.pii_category_counts:
+                self.pii_category_counts[category] = count
+        self.fingerprints = FingerprintSet.from_array(decode_fingerprints(state["fingerprints"]))
+        if self.near_duplicate_index is not None:
+            # The index holds every distinct fingerprint seen so far
+            for fingerprint in self.fingerprints.to_array().tolist():
+                self.near_duplicate_index.add(fingerprint)
+        if self.turn_details is not None and state["turn_details"] is not None:
+            self.turn_details = TurnDetails.from_dict(state["turn_details"])
+
+    @property
+    def duplicates(self) -> int:
+        """Turns whose fingerprint repeats an earlier turn's."""
+        return self.turn_count - len(self.fingerprints)
+
+    @property
+    def average_word_count_score(self) -> float:
+        return self.word_count_score_sum / self.turn_count if self.turn_count else 0
+
+    @property
+    def average_quality(self) -> float:
+        return self.quality_sum / self.valid_count if self.valid_count else 0.0
@@ -0,0 +1,43 @@
+import re
+from typing import List
+
+# Same letter pattern and shingle width the `simhash` package uses when it is
+# given raw text, so fingerprints built from these shingles are identical.
+SIMHASH_LETTER_REGEX = re.compile(r"[\w\u4e00-\u9fcc]+")
+SIMHASH_SHINGLE_WIDTH = 4
+
+
+class AnalyzedText:
+    """
+    The tokenized form of a conversation turn shared by every lexical scorer
+    (complexity, word count and uniqueness hash). Each derived view is computed
+    once, on first use, so a turn is only tokenized a single time.
+    """
+    __slots__ = ("text", "_tokens", "_lower_tokens")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._tokens = None
+        self._lower_tokens = None
+
+    @property
+    def tokens(self) -> List[str]:
+        if self._tokens is None:
+            # Imported lazily: loading nltk dominates the import time of this package
+            from nltk.tokenize import word_tokenize
+            self._tokens = word_tokenize(self.text)
+        return self._tokens
+
+    @property
+    def lower_tokens(self) -> List[str]:
+        if self._lower_tokens is None:
+            self._lower_tokens = [token.lower() for token in self.tokens]
+        return self._lower_tokens
+
+    @property
+    def token_lengths(self) -> List[int]:
+        return [len(token) for token in self.lower_tokens]
+
+    @property
+    def word_count(self) -> int:
+        return len(self.tokens)
@@ -0,0 +1,70 @@
+"""
+Compares the per-turn quality scores of an embedding backend against a
+reference backend (torch by default) on a corpus file.
+
+    python -m my_proof.backend_validation input/data.json --backend onnx-int8
+
+The corpus may be a list of user/bot turns, an object with `conversations`,
+or (with --tee-format) a TEE request. Reports the max/mean/p99 absolute
+deviation, how many turns flip across MIN_QUALITY_SCORE, and the throughput
+of both backends.
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .config import settings
+from .embedding_backends import BACKEND_NAMES, EmbeddingBackend, create_backend
+from .models_llm import ChatTurn
+from .request_stream import ConversationStream
+
+
+def _quality_scores(backend: EmbeddingBackend, turns: List[ChatTurn]) -> np.ndarray:
+    scores = []
+    for start in range(0, len(turns), settings.QUALITY_BATCH_SIZE):
+        batch = turns[start:start + settings.QUALITY_BATCH_SIZE]
+        embeddings = backend.encode([turn.user for turn in batch] + [turn.bot for turn in batch])
+        scores.append(np.einsum("ij,ij->i", embeddings[:len(batch)], embeddings[len(batch):]))
+    return np.concatenate(scores) if scores else np.zeros(0)
+
+
+def compare(turns: List[ChatTurn], candidate: str, reference: str = "torch") -> Dict[str, Any]:
+    results: Dict[str, Any] = {"turns": len(turns), "candidate": candidate, "reference": reference}
+    scores = {}
+    for name in (reference, candidate):
+        backend = create_backend(name)
+        started = time.perf_counter()
+        scores[name] = _quality_scores(backend, turns)
+        elapsed = time.perf_counter() - started
+        results[f"{name}_turns_per_sec"] = len(turns) / elapsed if elapsed > 0 else None
+
+    deviation = np.abs(scores[candidate] - scores[reference])
+    passes_reference = scores[reference] > settings.MIN_QUALITY_SCORE
+    passes_candidate = scores[candidate] > settings.MIN_QUALITY_SCORE
+    results.update({
+        "max_abs_deviation": float(deviation.max()) if len(deviation) else 0.0,
+        "mean_abs_deviation": float(deviation.mean()) if len(deviation) else 0.0,
+        "p99_abs_deviation": float(np.percentile(deviation, 99)) if len(deviation) else 0.0,
+        "threshold_flips": int(np.count_nonzero(passes_reference != passes_candidate)),
+    })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus")
+    parser.add_argument("--backend", default="onnx-int8", choices=BACKEND_NAMES)
+    parser.add_argument("--reference", default="torch", choices=BACKEND_NAMES)
+    parser.add_argument("--tee-format", action="store_true", help="Corpus uses prompt/answer keys")
+    args = parser.parse_args()
+
+    with open(args.corpus, "rb") as f:
+        turns = [ChatTurn(**conv) for conv in ConversationStream(f, tee_format=args.tee_format)]
+    print(json.dumps(compare(turns, args.backend, args.reference), indent=2))
+
+
+if __name__ == "__main__":
+    main()
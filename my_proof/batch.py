@@ -0,0 +1,146 @@
+"""
+Scores many input files in one process and writes one FinalProof JSON per line.
+
+    python -m my_proof.batch archive/                 # every *.json in a directory
+    python -m my_proof.batch "archive/2024-*/*.json"  # a glob
+    python -m my_proof.batch @manifest.txt -o proofs.jsonl
+
+A manifest lists one path per line (blank lines and # comments are ignored).
+The model is loaded once and shared by BATCH_FILE_WORKERS threads. Their
+embedding calls are merged into joint model batches, and the largest files
+start first so the short ones fill in at the end. Proofs are written as they
+finish, each tagged with `attributes.source_file`. A file that cannot be read
+or parsed gets an error proof and does not affect the others.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, TextIO
+
+import ijson
+
+from .__main__ import load_config
+from .config import settings
+from .hash_codec import proof_json
+from .models_llm import FinalProof
+from .parallel import ParallelLexicalScorer
+from .proof import RegionalLanguageProof, generate_proof_from_stream
+from .request_stream import ConversationStream
+from .scorer import ChatScorer
+from .server import warm_scoring
+
+
+def resolve_inputs(sources: List[str]) -> List[str]:
+    """
+    Expands directories, globs and @manifest files into a list of unique paths.
+    """
+    paths: List[str] = []
+    for source in sources:
+        if source.startswith("@"):
+            with open(source[1:], encoding="utf-8") as f:
+                entries = [line.strip() for line in f]
+            paths.extend(entry for entry in entries if entry and not entry.startswith("#"))
+        elif os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, "*.json"))))
+        elif glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+        else:
+            paths.append(source)
+    return list(dict.fromkeys(paths))
+
+
+def _largest_first(paths: List[str]) -> List[str]:
+    def size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    return sorted(paths, key=size, reverse=True)
+
+
+def score_file(path: str, scorer: ChatScorer, base_config: Dict[str, Any], tee_format: bool = False,
+               lexical_pool: Optional[ParallelLexicalScorer] = None) -> FinalProof:
+    """
+    Scores one file with the shared scorer (and lexical pool, if any). Never
+    raises: failures become error proofs.
+    """
+    try:
+        with open(path, "rb") as f:
+            proof = generate_proof_from_stream(dict(base_config), ConversationStream(f, tee_format=tee_format),
+                                               scorer=scorer, lexical_pool=lexical_pool)
+    except ijson.JSONError as e:
+        # Malformed before the first turn; later errors are reported by the proof itself
+        logging.error(f"Could not parse {path}: {e}")
+        proof = RegionalLanguageProof.create_error_proof(f"Invalid JSON format: {e}")
+    except Exception as e:
+        logging.error(f"Could not score {path}: {e}")
+        proof = RegionalLanguageProof.create_error_proof(f"Could not read input file: {e}")
+    proof.attributes["source_file"] = path
+    return proof
+
+
+def run_batch(paths: List[str], output: TextIO, scorer: ChatScorer, base_config: Dict[str, Any],
+              workers: int = 4, tee_format: bool = False,
+              lexical_pool: Optional[ParallelLexicalScorer] = None) -> Dict[str, int]:
+    """
+    Scores `paths` on a thread pool and writes each proof to `output` as a JSON line.
+    """
+    write_lock = threading.Lock()
+    counts = {"files": len(paths), "valid": 0, "invalid": 0, "errors": 0}
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="batch-file") as pool:
+        futures = [pool.submit(score_file, path, scorer, base_config, tee_format, lexical_pool)
+                   for path in _largest_first(paths)]
+        try:
+            for future in as_completed(futures):
+                proof = future.result()
+                line = proof_json(proof)
+                with write_lock:
+                    output.write(line + "\n")
+                    output.flush()
+                if "error" in proof.attributes:
+                    counts["errors"] += 1
+                elif proof.valid:
+                    counts["valid"] += 1
+                else:
+                    counts["invalid"] += 1
+        except BaseException:
+            # e.g. KeyboardInterrupt: only the files already being scored are finished
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="Files, directories, globs or @manifest files")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=settings.BATCH_FILE_WORKERS,
+                        help="Files scored concurrently")
+    parser.add_argument("--tee-format", action="store_true", help="Inputs are TEE requests with prompt/answer keys")
+    args = parser.parse_args()
+
+    paths = resolve_inputs(args.sources)
+    logging.info(f"Scoring {len(paths)} files with {args.workers} workers")
+
+    with warm_scoring() as (scorer, lexical_pool):
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        started = time.perf_counter()
+        try:
+            counts = run_batch(paths, output, scorer, load_config(), args.workers, args.tee_format, lexical_pool)
+        except KeyboardInterrupt:
+            logging.warning("Batch interrupted; output holds the proofs finished so far")
+            sys.exit(130)
+        finally:
+            if args.output:
+                output.close()
+    logging.info(f"Scored {counts['files']} files in {time.perf_counter() - started:.2f}s: "
+                 f"{counts['valid']} valid, {counts['invalid']} invalid, {counts['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
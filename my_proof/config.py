@@ -7,6 +7,18 @@ class Settings(BaseSettings):
     """
     # --- Model Configuration ---
     SENTENCE_TRANSFORMER_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # Local directory holding a pre-downloaded copy of the model. When set the
+    # model is loaded from here with Hugging Face Hub lookups disabled.
+    SENTENCE_TRANSFORMER_MODEL_PATH: str = ""
+    # Embedding backend for quality scoring: "torch" (SentenceTransformer),
+    # "onnx" or "onnx-int8" (ONNX Runtime on CPU, full or int8-quantized weights)
+    EMBEDDING_BACKEND: str = "torch"
+    # Directory written by `python -m my_proof.onnx_export`
+    ONNX_MODEL_DIR: str = "models/onnx"
+    # Texts per ONNX Runtime forward pass
+    ONNX_BATCH_SIZE: int = 32
+    # Intra-op threads for ONNX Runtime; 0 lets the runtime decide
+    ONNX_NUM_THREADS: int = 0
 
     # --- Scoring Thresholds ---
     MIN_COMPLEXITY_SCORE: float = 0.2
@@ -17,6 +29,107 @@ class Settings(BaseSettings):
     # --- ADD THIS LINE ---
     # The word count at which the word count score will be 1.0 (or higher)
     TARGET_WORD_COUNT: int = 100 
+    # PII that makes a turn invalid: any of email, phone, aadhaar, pan
+    PII_CATEGORIES: str = "email,phone"
+    # Turns with fewer tokens (user + bot) never pass; 0 disables the check
+    MIN_TURN_WORDS: int = 0
+
+    # Add struct-of-arrays details of every passing turn (index, complexity,
+    # quality, fingerprint) to the proof attributes as `valid_conversations`
+    INCLUDE_TURN_DETAILS: bool = False
+
+    # How the proof metadata lists the file's fingerprints: "decimal" (a sorted
+    # list of decimal strings in `all_uniqueness_hashes`) or "compact" (one
+    # delta-encoded, zlib-compressed base64 string in
+    # `all_uniqueness_hashes_compact`; see my_proof.hash_codec)
+    UNIQUENESS_HASH_ENCODING: str = "decimal"
+
+    # --- Near-Duplicate Detection ---
+    # Also count turns whose SimHash is within NEAR_DUPLICATE_THRESHOLD bits of
+    # an earlier turn as (near) duplicates, not only exact fingerprint matches
+    NEAR_DUPLICATE_DETECTION: bool = False
+    NEAR_DUPLICATE_THRESHOLD: int = 3
+    # Bit blocks the near-duplicate index splits fingerprints into; 0 = threshold + 1
+    NEAR_DUPLICATE_BLOCKS: int = 0
+
+    # --- Global Fingerprint Store ---
+    # Directory of the persistent fingerprint store. When set, the
+    # `uniqueness_hashes` of incoming requests are recorded in it and it can
+    # serve as a local Tier 2 (see my_proof.tier2_service)
+    FINGERPRINT_STORE_DIR: str = ""
+    # Largest Hamming radius the store's lookup tables are built for
+    FINGERPRINT_STORE_RADIUS: int = 3
+    # Appended fingerprints merged into the sorted base files at this size
+    FINGERPRINT_STORE_COMPACT_THRESHOLD: int = 100_000
+
+    # --- Performance ---
+    # Only send turns that pass the PII, complexity and length checks to the
+    # embedding model; the others cannot pass anyway. Scores are unchanged.
+    QUALITY_CASCADE: bool = True
+    # Number of conversations scored together: their user/bot texts are embedded
+    # in a single model call and, in parallel mode, sent to a worker as one task.
+    QUALITY_BATCH_SIZE: int = 64
+    # Worker processes for the lexical features (PII, tokenization, SimHash).
+    # 0 or 1 keeps the serial single-process path.
+    SCORING_WORKERS: int = 0
+    # SimHash implementation: "compat" gives the `simhash` package's values bit
+    # for bit; "fast" hashes shingles without MD5, and its fingerprints are not
+    # comparable with compat ones (see my_proof.simhash_batch)
+    SIMHASH_MODE: str = "compat"
+    # Run parsing, lexical features and the embedding model at the same time in
+    # their own threads, connected by bounded queues (see my_proof.pipeline)
+    PIPELINE_ENABLED: bool = False
+    # Batches of QUALITY_BATCH_SIZE turns that may wait between two stages
+    PIPELINE_QUEUE_SIZE: int = 4
+
+    # --- Incremental Scoring ---
+    # Directory of per-file scoring state, keyed by the request's file_id. When
+    # set, a resubmitted file only scores the turns appended since the last run
+    # and a killed job resumes from its last checkpoint (see my_proof.incremental)
+    INCREMENTAL_STATE_DIR: str = ""
+    # Turns between two state checkpoints during a run; 0 saves only at the end
+    INCREMENTAL_CHECKPOINT_TURNS: int = 10_000
+
+    # --- Instrumentation ---
+    # Record counts, total time and latency percentiles of every proof stage
+    # (parse, validate, pii, tokenize, complexity, word_count, simhash, quality...)
+    INSTRUMENTATION_ENABLED: bool = False
+    # "attributes" (FinalProof attributes.instrumentation), "stderr", or a file
+    # path that receives one JSON line per proof
+    INSTRUMENTATION_SINK: str = "attributes"
+    # Write cProfile stats of each proof to this file
+    PROFILE_OUTPUT: str = ""
+
+    # --- Embedding Cache ---
+    # Reuse embeddings of previously seen texts instead of re-running the model
+    EMBEDDING_CACHE_ENABLED: bool = False
+    # Directory of the persistent store; empty keeps the cache in memory only
+    EMBEDDING_CACHE_DIR: str = ""
+    # Maximum number of embeddings kept on disk before LRU eviction
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
+    # Size of the in-memory LRU layer in front of the disk store
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 20_000
+    # Long-running processes save the on-disk index at least this often while
+    # they write, so a killed process loses at most this much of it
+    EMBEDDING_CACHE_FLUSH_INTERVAL_S: float = 60.0
+
+    # --- Scoring Server ---
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8080
+    # Listen on this Unix socket instead of TCP when set
+    SERVER_UNIX_SOCKET: str = ""
+    # Requests scored at the same time; further requests wait for a slot
+    SERVER_MAX_CONCURRENCY: int = 4
+    # Seconds a request may wait for a slot before getting HTTP 503
+    SERVER_QUEUE_TIMEOUT_S: float = 30.0
+    # Embedding calls from concurrent requests are merged up to this many texts...
+    SERVER_BATCH_MAX_TEXTS: int = 256
+    # ...or for at most this long after the first call arrives
+    SERVER_BATCH_WAIT_MS: float = 5.0
+
+    # --- Batch Mode ---
+    # Files scored concurrently by `python -m my_proof.batch`
+    BATCH_FILE_WORKERS: int = 4
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -0,0 +1,138 @@
+import json
+import os
+from typing import TYPE_CHECKING, List
+
+import numpy as np
+
+from .config import settings
+
+# Backend libraries (torch/sentence-transformers, onnxruntime/tokenizers) are
+# imported only when their backend is constructed.
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+BACKEND_NAMES = ("torch", "onnx", "onnx-int8")
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+
+
+def load_sentence_transformer() -> "SentenceTransformer":
+    """
+    Loads the quality model. A pre-baked SENTENCE_TRANSFORMER_MODEL_PATH is
+    loaded with Hugging Face Hub access disabled, so startup never waits on
+    the network.
+    """
+    model_source = settings.SENTENCE_TRANSFORMER_MODEL
+    if settings.SENTENCE_TRANSFORMER_MODEL_PATH:
+        # Read by huggingface_hub at import time, so set before the import below
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        model_source = settings.SENTENCE_TRANSFORMER_MODEL_PATH
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_source)
+
+
+class EmbeddingBackend:
+    """
+    Turns texts into unit-normalized float32 sentence embeddings.
+    """
+    name = ""
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TorchBackend(EmbeddingBackend):
+    """
+    Full-precision PyTorch SentenceTransformer (the reference backend).
+    """
+    name = "torch"
+
+    def __init__(self):
+        self.model = load_sentence_transformer()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    Runs the transformer exported by `python -m my_proof.onnx_export` with ONNX
+    Runtime on CPU and applies the model's mean pooling in NumPy. Only
+    onnxruntime and tokenizers are needed at runtime, not torch.
+
+    Texts are length-sorted before batching so each forward pass pads to
+    similar lengths; results are returned in input order.
+    """
+    def __init__(self, model_dir: str, quantized: bool = False):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        model_path = os.path.join(model_dir, ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; run `python -m my_proof.onnx_export` first")
+
+        self.max_seq_length = 128
+        config_path = os.path.join(model_dir, "sentence_bert_config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                self.max_seq_length = json.load(f).get("max_seq_length", self.max_seq_length)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        pad_id = self.tokenizer.token_to_id("<pad>")
+        self.pad_id = pad_id if pad_id is not None else 0
+
+        options = ort.SessionOptions()
+        if settings.ONNX_NUM_THREADS > 0:
+            options.intra_op_num_threads = settings.ONNX_NUM_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        encodings = self.tokenizer.encode_batch(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids), reverse=True)
+        embeddings = None
+        batch_size = max(settings.ONNX_BATCH_SIZE, 1)
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            pooled = self._encode_batch([encodings[i].ids for i in positions])
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[positions] = pooled
+        return embeddings
+
+    def _encode_batch(self, token_ids: List[List[int]]) -> np.ndarray:
+        max_length = max(len(ids) for ids in token_ids)
+        input_ids = np.full((len(token_ids), max_length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), max_length), dtype=np.int64)
+        for row, ids in enumerate(token_ids):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then unit-normalize
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def create_backend(name: str = "") -> EmbeddingBackend:
+    """
+    Builds the backend named by `name` (default: settings.EMBEDDING_BACKEND).
+    """
+    name = name or settings.EMBEDDING_BACKEND
+    if name == "torch":
+        return TorchBackend()
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(settings.ONNX_MODEL_DIR, quantized=name == "onnx-int8")
+    raise ValueError(f"Unknown embedding backend '{name}'; expected one of {', '.join(BACKEND_NAMES)}")
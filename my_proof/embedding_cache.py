@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .file_lock import file_lock
+
+CACHE_FORMAT_VERSION = 2
+KEY_BYTES = 16
+
+
+class CacheStats:
+    """
+    Hit/miss counters for the embedding lookups of a single proof.
+    """
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of sentence embeddings.
+
+    Entries are keyed by a hash of (model name, NFC-normalized text) and held
+    as float16 vectors. A small in-memory LRU sits in front of an optional
+    on-disk store made of a memory-mapped float16 matrix (`vectors.f16`), the
+    key of every row (`keys.bin`) and an LRU-ordered index of key -> row
+    (`index.json`). When the disk store is full the least recently used row is
+    overwritten.
+
+    A row is only returned if `keys.bin` still holds the requested key, so an
+    index that is older than the rows (a process killed before `flush`, or
+    another process sharing the directory) costs misses, never wrong vectors.
+    Writers in different processes take turns through a lock file, and the
+    index is also saved every `flush_interval_s` seconds of writes. A failing
+    disk store is logged and skipped; it never fails the caller.
+    """
+    def __init__(self, model_name: str, directory: str = "", max_entries: int = 200_000, memory_entries: int = 20_000,
+                 flush_interval_s: float = 60.0):
+        self.model_name = model_name
+        self.directory = directory
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.flush_interval_s = flush_interval_s
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._index: "OrderedDict[bytes, int]" = OrderedDict()
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        # Rows before this one were already found taken
+        self._next_free = 0
+        # Next row to reclaim when the store is full and no index entry can be evicted
+        self._next_reclaimed = 0
+        self._last_flush = time.monotonic()
+        self._dim: Optional[int] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        if directory:
+            self._load()
+
+    # --- Keys ---
+    def key(self, text: str) -> bytes:
+        normalized = unicodedata.normalize("NFC", text)
+        return hashlib.sha256(f"{self.model_name}\x00{normalized}".encode("utf-8")).digest()[:16]
+
+    # --- Lookups ---
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Returns the cached float16 vector of every text, or None for misses.
+        """
+        with self._lock:
+            return [self._get(self.key(text)) for text in texts]
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        entries = [(self.key(text), np.asarray(vector, dtype=np.float16)) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            for key, vector in entries:
+                self._remember(key, vector)
+            if not entries or not self.directory or self.max_entries <= 0:
+                return
+            try:
+                if self._vectors is None:
+                    self._create_store(entries[0][1].shape[0])
+                with file_lock(self._path("lock")):
+                    for key, vector in entries:
+                        self._store(key, vector)
+                if time.monotonic() - self._last_flush >= self.flush_interval_s:
+                    self._flush()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not write to the embedding cache at {self.directory}: {e}")
+
+    def _get(self, key: bytes) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+        slot = self._index.get(key)
+        if slot is None:
+            return None
+        vector = np.array(self._vectors[slot])
+        # Checked after the copy: a writer clears the key before changing the row
+        if self._keys[slot].tobytes() != key:
+            del self._index[key]
+            self._dirty = True
+            return None
+        self._index.move_to_end(key)
+        self._dirty = True
+        self._remember(key, vector)
+        return vector
+
+    def _store(self, key: bytes, vector: np.ndarray) -> None:
+        # Called with the lock file held
+        if vector.shape[0] != self._dim:
+            return
+        slot = self._index.get(key)
+        if slot is None or self._keys[slot].tobytes() != key:
+            slot = self._free_slot()
+            if slot is None:
+                slot = self._evicted_slot()
+        self._keys[slot] = 0
+        self._vectors[slot] = vector
+        self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self._index[key] = slot
+        self._index.move_to_end(key)
+        self._dirty = True
+
+    def _free_slot(self) -> Optional[int]:
+        # Rows other processes filled have a key, so they are skipped too
+        while self._next_free < self.max_entries:
+            slot = self._next_free
+            self._next_free += 1
+            if not self._keys[slot].any():
+                return slot
+        return None
+
+    def _evicted_slot(self) -> int:
+        if self._index:
+            # Evict the least recently used row and reuse it
+            _, slot = self._index.popitem(last=False)
+            return slot
+        # The store is full of rows this process has no index entry for (written
+        # by another process, or listed in an index that was never saved): take
+        # them in turn. Whoever indexed one gets a miss, as keys.bin no longer matches.
+        slot = self._next_reclaimed % self.max_entries
+        self._next_reclaimed += 1
+        return slot
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- Disk store ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _matches(self, meta: dict) -> bool:
+        return (meta.get("version") == CACHE_FORMAT_VERSION
+                and meta.get("model") == self.model_name
+                and meta.get("capacity") == self.max_entries)
+
+    def _load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        meta = self._read_meta()
+        if meta is None:
+            return
+        if not self._matches(meta):
+            logging.info(f"Embedding cache at {self.directory} does not match the current settings; starting empty")
+            return
+        try:
+            self._open_store(meta["dim"], "r+")
+        except (OSError, ValueError):
+            # e.g. a store of the previous format, without keys.bin
+            self._vectors = self._keys = None
+            return
+        self._index = self._read_index()
+        logging.info(f"Loaded embedding cache with {len(self._index)} entries from {self.directory}")
+
+    def _open_store(self, dim: int, mode: str) -> None:
+        self._dim = dim
+        self._vectors = np.memmap(self._path("vectors.f16"), dtype=np.float16, mode=mode,
+                                  shape=(self.max_entries, dim))
+        self._keys = np.memmap(self._path("keys.bin"), dtype=np.uint8, mode=mode,
+                               shape=(self.max_entries, KEY_BYTES))
+
+    def _read_index(self) -> "OrderedDict[bytes, int]":
+        """
+        The saved index, without entries whose row now holds another key.
+        """
+        try:
+            with open(self._path("index.json")) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        index = OrderedDict()
+        for key_hex, slot in entries:
+            key = bytes.fromhex(key_hex)
+            if 0 <= slot < self.max_entries and self._keys[slot].tobytes() == key:
+                index[key] = slot
+        return index
+
+    def _create_store(self, dim: int) -> None:
+        with file_lock(self._path("lock")):
+            # Another process may have created the store since this one started
+            meta = self._read_meta()
+            if meta is not None and self._matches(meta) and meta.get("dim") == dim:
+                self._open_store(dim, "r+")
+                self._index = self._read_index()
+                return
+            self._index.clear()
+            self._open_store(dim, "w+")
+            self._write_json("meta.json", {
+                "version": CACHE_FORMAT_VERSION,
+                "model": self.model_name,
+                "dim": dim,
+                "capacity": self.max_entries,
+            })
+
+    def _write_json(self, name: str, payload) -> None:
+        tmp_path = self._path(name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._path(name))
+
+    def flush(self) -> None:
+        """
+        Persists the disk index (in LRU order) and the vector matrix. Entries
+        another process saved for rows still holding their key are kept, as
+        the least recently used ones.
+        """
+        with self._lock:
+            try:
+                self._flush()
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not save the embedding cache at {self.directory}: {e}")
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._dirty or self._vectors is None:
+            return
+        with file_lock(self._path("lock")):
+            self._vectors.flush()
+            self._keys.flush()
+            index = OrderedDict((key, slot) for key, slot in self._read_index().items() if key not in self._index)
+            for key, slot in self._index.items():
+                if self._keys[slot].tobytes() == key:
+                    index[key] = slot
+            self._write_json("index.json", [[key.hex(), slot] for key, slot in index.items()])
+        self._index = index
+        self._dirty = False
@@ -0,0 +1,18 @@
+import fcntl
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Holds an exclusive advisory lock on `path` (created if missing) for the
+    block, so processes sharing a cache or store directory write one at a time.
+    A `shared` lock lets readers in while keeping writers out.
+    """
+    with open(path, "a+b") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
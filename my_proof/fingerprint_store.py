@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from .config import settings
+from .file_lock import file_lock
+from .near_duplicates import FINGERPRINT_BITS, HammingIndex, block_layout
+
+STORE_FORMAT_VERSION = 1
+U64 = np.dtype("<u8")
+
+
+def as_fingerprint_array(fingerprints: Iterable[Union[int, str]]) -> np.ndarray:
+    """
+    Converts fingerprints given as ints or decimal strings to a uint64 array.
+    """
+    return np.array([int(fp) for fp in fingerprints], dtype=np.uint64)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    as_bytes = values.astype(U64).view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1)
+
+
+class FingerprintStore:
+    """
+    Persistent set of 64-bit SimHash fingerprints that answers exact and
+    Hamming-radius membership for whole batches of fingerprints.
+
+    Layout of `directory`:
+      base.u64      sorted unique fingerprints (little-endian uint64), memory-mapped
+      table_N.u64   the base fingerprints with their bit blocks permuted so the
+                    key blocks of table N come first, sorted; a radius query is
+                    a binary search for the key prefix plus a popcount over the
+                    few values sharing it (the HammingIndex scheme, on disk)
+      append.log    fingerprints added since the last compaction, appended raw
+      meta.json     format version and the radius/blocks the tables serve
+      lock          lock file held while the store is read or changed
+
+    Added fingerprints go to the append log and an in-memory HammingIndex.
+    Once the log holds `compact_threshold` entries it is merged into a new
+    base and the tables are rebuilt.
+
+    Several processes may share a directory: every operation takes the lock
+    file and first reads what other processes appended to the log since, or
+    maps the new base if one of them compacted.
+    """
+    def __init__(self, directory: str, radius: int = 3, blocks: int = 0, compact_threshold: int = 100_000):
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        meta = self._read_meta()
+        if meta and meta.get("version") == STORE_FORMAT_VERSION:
+            # The on-disk tables decide which radius can be served
+            radius, blocks = meta["radius"], meta["blocks"]
+        self.radius = radius
+        ranges, key_blocks = block_layout(radius, blocks)
+        self.blocks = len(ranges)
+        self._permutations = [self._permutation(ranges, combo) for combo in key_blocks]
+        if not meta:
+            self._write_meta()
+
+        with file_lock(self._path("lock"), shared=True):
+            self._map_base()
+
+    # --- Public API ---
+    def __len__(self) -> int:
+        return len(self._base) + len(self._pending)
+
+    def contains(self, fingerprints: Iterable[Union[int, str]], radius: int = 0) -> np.ndarray:
+        """
+        For each fingerprint, whether the store holds one within `radius` bits.
+        """
+        if radius > self.radius:
+            raise ValueError(f"This store serves radius <= {self.radius}")
+        queries = as_fingerprint_array(fingerprints)
+        with self._lock, file_lock(self._path("lock"), shared=True):
+            self._sync()
+            found = self._in_base(queries)
+            if radius > 0:
+                for (shifts, key_bits), table in zip(self._permutations, self._tables):
+                    found |= self._near_in_table(self._permute(queries, shifts), key_bits, table, radius)
+            for position, fp in enumerate(queries.tolist()):
+                if not found[position]:
+                    found[position] = (fp in self._pending if radius == 0
+                                       else self._pending_index.find(fp, radius) is not None)
+        return found
+
+    def add(self, fingerprints: Iterable[Union[int, str]]) -> int:
+        """
+        Adds fingerprints, returning how many were new.
+        """
+        values = np.unique(as_fingerprint_array(fingerprints))
+        with self._lock, file_lock(self._path("lock")):
+            self._sync()
+            values = values[~self._in_base(values)]
+            new = [fp for fp in values.tolist() if fp not in self._pending]
+            if new:
+                data = np.array(new, dtype=U64).tobytes()
+                with open(self._path("append.log"), "ab") as f:
+                    f.write(data)
+                self._log_offset += len(data)
+                for fp in new:
+                    self._pending.add(fp)
+                    self._pending_index.add(fp)
+            if len(self._pending) >= self.compact_threshold:
+                self._compact()
+        return len(new)
+
+    def compact(self) -> None:
+        with self._lock, file_lock(self._path("lock")):
+            self._sync()
+            self._compact()
+
+    # --- Internals ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._path("meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self) -> None:
+        with open(self._path("meta.json"), "w") as f:
+            json.dump({"version": STORE_FORMAT_VERSION, "radius": self.radius, "blocks": self.blocks}, f)
+
+    def _map(self, name: str) -> np.ndarray:
+        path = self._path(name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=U64)
+        return np.memmap(path, dtype=U64, mode="r")
+
+    def _base_version(self) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self._path("base.u64"))
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _log_size(self) -> int:
+        try:
+            return os.path.getsize(self._path("append.log"))
+        except FileNotFoundError:
+            return 0
+
+    def _map_base(self) -> None:
+        # Called under the lock file, so the base, tables and log belong together
+        self._base_mapped = self._base_version()
+        self._base = self._map("base.u64")
+        self._tables = [self._map(f"table_{i}.u64") for i in range(len(self._permutations))]
+        self._pending = set()
+        self._pending_index = HammingIndex(self.radius, self.blocks)
+        self._log_offset = 0
+        self._read_log()
+
+    def _sync(self) -> None:
+        """
+        Catches up with other processes: maps the new base if one of them
+        compacted, then reads the log entries they appended.
+        """
+        if self._base_version() != self._base_mapped or self._log_size() < self._log_offset:
+            self._map_base()
+        else:
+            self._read_log()
+
+    def _read_log(self) -> None:
+        usable = self._log_size() // U64.itemsize * U64.itemsize
+        if usable <= self._log_offset:
+            return
+        with open(self._path("append.log"), "rb") as f:
+            f.seek(self._log_offset)
+            logged = np.frombuffer(f.read(usable - self._log_offset), dtype=U64)
+        self._log_offset = usable
+        for fp in logged.tolist():
+            if fp not in self._pending:
+                self._pending.add(fp)
+                self._pending_index.add(fp)
+
+    @staticmethod
+    def _permutation(ranges: List[Tuple[int, int]], key_combo: Tuple[int, ...]) -> Tuple[List[Tuple[int, int, int]], int]:
+        # Move the key blocks to the top bits; Hamming distances are unchanged
+        order = list(key_combo) + [i for i in range(len(ranges)) if i not in key_combo]
+        shifts = []
+        cursor = FINGERPRINT_BITS
+        for block in order:
+            start, end = ranges[block]
+            cursor -= end - start
+            shifts.append((start, (1 << (end - start)) - 1, cursor))
+        key_bits = sum(ranges[block][1] - ranges[block][0] for block in key_combo)
+        return shifts, key_bits
+
+    @staticmethod
+    def _permute(values: np.ndarray, shifts: List[Tuple[int, int, int]]) -> np.ndarray:
+        permuted = np.zeros(len(values), dtype=np.uint64)
+        for start, mask, target in shifts:
+            permuted |= ((values >> np.uint64(start)) & np.uint64(mask)) << np.uint64(target)
+        return permuted
+
+    def _in_base(self, queries: np.ndarray) -> np.ndarray:
+        if len(self._base) == 0 or len(queries) == 0:
+            return np.zeros(len(queries), dtype=bool)
+        positions = np.searchsorted(self._base, queries)
+        positions[positions == len(self._base)] = 0
+        return np.asarray(self._base[positions] == queries)
+
+    @staticmethod
+    def _near_in_table(permuted: np.ndarray, key_bits: int, table: np.ndarray, radius: int) -> np.ndarray:
+        found = np.zeros(len(permuted), dtype=bool)
+        if len(table) == 0 or len(permuted) == 0:
+            return found
+        low_bits = np.uint64(FINGERPRINT_BITS - key_bits)
+        low = (permuted >> low_bits) << low_bits
+        high = low | ((np.uint64(1) << low_bits) - np.uint64(1)) if key_bits < FINGERPRINT_BITS else low
+        starts = np.searchsorted(table, low, side="left")
+        ends = np.searchsorted(table, high, side="right")
+        # Flatten every query's candidate range into one gather + popcount
+        counts = ends - starts
+        owners = np.repeat(np.arange(len(permuted)), counts)
+        offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = np.asarray(table[np.repeat(starts, counts) + offsets])
+        close = popcount(candidates ^ permuted[owners]) <= radius
+        found[owners[close]] = True
+        return found
+
+    def _compact(self) -> None:
+        merged = np.union1d(np.asarray(self._base), np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending)))
+        self._write_array("base.u64", merged)
+        for i, (shifts, _) in enumerate(self._permutations):
+            self._write_array(f"table_{i}.u64", np.sort(self._permute(merged, shifts)))
+        # Only drop the log once the new base and tables are in place
+        open(self._path("append.log"), "wb").close()
+
+        self._map_base()
+        logging.info(f"Compacted fingerprint store at {self.directory} to {len(self._base)} fingerprints")
+
+    def _write_array(self, name: str, values: np.ndarray) -> None:
+        tmp_path = self._path(name + ".tmp")
+        values.astype(U64).tofile(tmp_path)
+        os.replace(tmp_path, self._path(name))
+
+
+_shared_stores: Dict[str, FingerprintStore] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def open_shared_store(directory: str) -> FingerprintStore:
+    """
+    Returns the process-wide store for `directory`, configured from settings,
+    so concurrent proofs append to one log instead of racing on it.
+    """
+    key = os.path.abspath(directory)
+    with _shared_stores_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = FingerprintStore(
+                directory,
+                radius=settings.FINGERPRINT_STORE_RADIUS,
+                compact_threshold=settings.FINGERPRINT_STORE_COMPACT_THRESHOLD,
+            )
+        return _shared_stores[key]
@@ -0,0 +1,111 @@
+"""
+Compact encoding of the proof's uniqueness hashes, and a faster proof serializer.
+
+A compact value is the tag "u64dz1:" followed by base64 of the
+zlib-compressed fingerprints. Before compression the fingerprints are
+sorted as uint64, delta-encoded, and byte-shuffled (all lowest bytes
+first, then the next bytes...). The shuffle groups the mostly-zero high
+bytes of the deltas.
+
+    python -m my_proof.hash_codec decode proof.json     # -> JSON list of decimal strings
+    python -m my_proof.hash_codec encode proof.json     # -> proof with compact metadata
+"""
+import argparse
+import base64
+import json
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Union
+
+import numpy as np
+
+from .models_llm import FinalProof
+
+COMPACT_TAG = "u64dz1:"
+DECIMAL_KEY = "all_uniqueness_hashes"
+COMPACT_KEY = "all_uniqueness_hashes_compact"
+U64 = np.dtype("<u8")
+
+
+def encode_fingerprints(fingerprints: Union[np.ndarray, Iterable[Union[int, str]]]) -> str:
+    """
+    Encodes a set of 64-bit fingerprints (ints, decimal strings or a uint64
+    array) into the tagged compact string. Duplicates are dropped.
+    """
+    if not isinstance(fingerprints, np.ndarray):
+        fingerprints = np.array([int(fp) for fp in fingerprints], dtype=np.uint64)
+    values = np.unique(fingerprints.astype(np.uint64))
+    deltas = np.diff(values, prepend=np.uint64(0)).astype(U64)
+    shuffled = deltas.view(np.uint8).reshape(-1, U64.itemsize).T.tobytes()
+    return COMPACT_TAG + base64.b64encode(zlib.compress(shuffled, 6)).decode("ascii")
+
+
+def decode_fingerprints(encoded: str) -> np.ndarray:
+    """
+    Decodes a compact string back into the sorted uint64 fingerprints.
+    """
+    if not encoded.startswith(COMPACT_TAG):
+        raise ValueError(f"Not a compact uniqueness hash encoding (expected the {COMPACT_TAG!r} tag)")
+    shuffled = np.frombuffer(zlib.decompress(base64.b64decode(encoded[len(COMPACT_TAG):])), dtype=np.uint8)
+    if len(shuffled) % U64.itemsize:
+        raise ValueError("Corrupt compact uniqueness hash encoding")
+    deltas = shuffled.reshape(U64.itemsize, -1).T.copy().view(U64).ravel()
+    return np.cumsum(deltas, dtype=np.uint64)
+
+
+def to_decimal_strings(fingerprints: np.ndarray) -> List[str]:
+    """The fingerprints as decimal strings in the order of the decimal metadata list."""
+    return sorted(str(fp) for fp in fingerprints.tolist())
+
+
+def fingerprints_from_metadata(metadata: Dict[str, Any]) -> List[str]:
+    """
+    Reads the uniqueness hashes of a proof's metadata in either encoding.
+    """
+    if COMPACT_KEY in metadata:
+        return to_decimal_strings(decode_fingerprints(metadata[COMPACT_KEY]))
+    return list(metadata.get(DECIMAL_KEY, []))
+
+
+def proof_json(proof: FinalProof) -> str:
+    """
+    Serializes a proof like `model_dump_json`, using orjson on a shallow
+    field dict when it is installed (no copy of the metadata lists).
+    """
+    try:
+        import orjson
+    except ImportError:
+        return proof.model_dump_json()
+    try:
+        return orjson.dumps({name: getattr(proof, name) for name in FinalProof.model_fields}).decode("utf-8")
+    except TypeError:
+        # Values orjson does not know (e.g. numpy scalars); pydantic handles them
+        return proof.model_dump_json()
+
+
+def _read_json(path: str) -> Any:
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["decode", "encode"])
+    parser.add_argument("proof", nargs="?", default="-", help="Proof JSON file (default: stdin)")
+    args = parser.parse_args()
+
+    proof = _read_json(args.proof)
+    metadata = proof.get("metadata", {})
+    if args.command == "decode":
+        print(json.dumps(fingerprints_from_metadata(metadata)))
+    else:
+        encoded = encode_fingerprints(fingerprints_from_metadata(metadata))
+        metadata.pop(DECIMAL_KEY, None)
+        metadata[COMPACT_KEY] = encoded
+        print(json.dumps(proof))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Resumable scoring state per input file, keyed by the TEE request's `file_id`.
+
+Contributors often resubmit a file with new conversations appended. The
+earlier turns' scores cannot change, so the proof's running totals (see
+`ProofAggregator.to_state`) are saved under the file_id together with the
+number of turns they cover and a digest of those turns. A later run for the
+same file_id parses the first turns again, and if their digest matches it
+restores the totals and scores only the new tail. The same state is written
+every INCREMENTAL_CHECKPOINT_TURNS turns, so a killed job resumes from its
+last checkpoint.
+
+The digest chains SHA-256 over each turn's canonical JSON, so it can be
+extended turn by turn from any saved value. A state whose digest or scoring
+settings do not match is ignored. The turns read to check it are spooled to
+a temporary file and scored from there.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from .aggregation import ProofAggregator
+from .config import settings
+
+STATE_FORMAT_VERSION = 1
+# Settings that change a turn's scores or the totals kept for it
+SCORING_SETTINGS = (
+    "SENTENCE_TRANSFORMER_MODEL", "EMBEDDING_BACKEND", "MIN_COMPLEXITY_SCORE", "MIN_QUALITY_SCORE",
+    "MIN_LEXICAL_DIVERSITY", "MIN_WORD_LENGTH", "TARGET_WORD_COUNT", "PII_CATEGORIES", "MIN_TURN_WORDS",
+    "INCLUDE_TURN_DETAILS", "NEAR_DUPLICATE_DETECTION", "NEAR_DUPLICATE_THRESHOLD", "QUALITY_CASCADE",
+    "SIMHASH_MODE",
+)
+# Turns spooled in memory before the replay file moves to disk
+SPOOL_MEMORY_BYTES = 16 * 1024 * 1024
+
+
+def _turn_bytes(turn: Any) -> bytes:
+    return json.dumps(turn, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def scoring_signature() -> Dict[str, Any]:
+    """The current values of SCORING_SETTINGS; a saved state is only reused under the same values."""
+    return {name: getattr(settings, name) for name in SCORING_SETTINGS}
+
+
+class IncrementalScoring:
+    """
+    Saved scoring state of one file_id in `directory`.
+
+    `resume` wraps the turn iterable: it skips the turns a matching saved
+    state covers and digests every turn it passes on. `checkpoint` saves the
+    totals once the turns counted in them have been scored.
+    """
+    def __init__(self, directory: str, file_id: Any, checkpoint_turns: int = 10_000):
+        self.directory = directory
+        self.file_id = str(file_id)
+        self.checkpoint_turns = checkpoint_turns
+        self.path = os.path.join(directory, hashlib.sha256(self.file_id.encode("utf-8")).hexdigest()[:32] + ".json")
+        self._digest = b""
+        self._turns = 0
+        # Digests of the turn prefixes a checkpoint may be written for
+        self._pending_digests: Dict[int, bytes] = {}
+
+    def resume(self, conversations: Iterable[Any], aggregate: ProofAggregator) -> Tuple[Iterator[Any], Optional[Dict[str, Any]]]:
+        """
+        Returns the turns still to score and, if a saved state matched, that
+        state (already restored into `aggregate`).
+        """
+        state = self._load()
+        conversations = iter(conversations)
+        if state is None or not state["turns"]:
+            return self._digested(conversations), None
+
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, mode="w+b")
+        for turn in conversations:
+            data = _turn_bytes(turn)
+            spool.write(data + b"\n")
+            self._extend(data)
+            if self._turns == state["turns"]:
+                break
+
+        if self._turns == state["turns"] and self._digest.hex() == state["digest"]:
+            spool.close()
+            aggregate.restore(state["aggregate"])
+            logging.info(f"Resuming file {self.file_id} after {self._turns} already scored turns")
+            return self._digested(conversations), state
+
+        logging.info(f"Saved state of file {self.file_id} does not match its first turns; scoring from the start")
+        self._digest, self._turns = b"", 0
+        return self._digested(chain(self._replay(spool), conversations)), None
+
+    def checkpoint(self, aggregate: ProofAggregator, quality_skipped: int, final: bool = False) -> None:
+        """
+        Saves `aggregate` if it covers a checkpoint boundary, or always when `final`.
+        """
+        turns = aggregate.turn_count
+        if final:
+            digest = self._digest
+        elif turns in self._pending_digests:
+            digest = self._pending_digests.pop(turns)
+        else:
+            return
+        self._save({
+            "version": STATE_FORMAT_VERSION,
+            "file_id": self.file_id,
+            "settings": scoring_signature(),
+            "turns": turns,
+            "digest": digest.hex(),
+            "quality_skipped": quality_skipped,
+            "aggregate": aggregate.to_state(),
+        })
+
+    @staticmethod
+    def _replay(spool: tempfile.SpooledTemporaryFile) -> Iterator[Any]:
+        with spool:
+            spool.seek(0)
+            for line in spool:
+                yield json.loads(line)
+
+    def _digested(self, conversations: Iterable[Any]) -> Iterator[Any]:
+        for turn in conversations:
+            self._extend(_turn_bytes(turn))
+            if self.checkpoint_turns > 0 and self._turns % self.checkpoint_turns == 0:
+                self._pending_digests[self._turns] = self._digest
+            yield turn
+
+    def _extend(self, data: bytes) -> None:
+        self._digest = hashlib.sha256(self._digest + data).digest()
+        self._turns += 1
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable scoring state {self.path}: {e}")
+            return None
+        if (state.get("version") != STATE_FORMAT_VERSION or state.get("file_id") != self.file_id or
+                state.get("settings") != scoring_signature()):
+            logging.info(f"Saved state of file {self.file_id} was made with other settings; scoring from the start")
+            return None
+        return state
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        tmp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # A temp file of its own: proofs of the same file_id may run on several threads
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save scoring state of file {self.file_id}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,227 @@
+import cProfile
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+# Latencies are counted in logarithmic buckets eight per doubling (~9% wide),
+# so percentiles cost a dict increment per sample, not a stored sample.
+_BUCKETS_PER_DOUBLING = 8
+_BUCKET_SCALE = _BUCKETS_PER_DOUBLING / math.log(2)
+_MIN_SECONDS = 1e-7
+
+
+class StageStats:
+    """
+    Count, total, maximum and a log-bucket histogram of one stage's latencies.
+    """
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = math.floor(math.log(max(seconds, _MIN_SECONDS)) * _BUCKET_SCALE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper edge of the bucket holding the given fraction of samples.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(math.exp((bucket + 1) / _BUCKET_SCALE), self.max)
+        return self.max
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        self.count += snapshot["count"]
+        self.total += snapshot["total"]
+        self.max = max(self.max, snapshot["max"])
+        for bucket, count in snapshot["buckets"].items():
+            self.buckets[int(bucket)] = self.buckets.get(int(bucket), 0) + count
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count, "total": self.total, "max": self.max, "buckets": dict(self.buckets)}
+
+    def report(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 4),
+            "p90_ms": round(self.percentile(0.90) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.max * 1000, 4),
+        }
+
+
+class _StageTimer:
+    __slots__ = ("_stats", "_started")
+
+    def __init__(self, stats: StageStats):
+        self._stats = stats
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._stats.add(time.perf_counter() - self._started)
+
+
+class Instrumentation:
+    """
+    Records per-stage latencies of one proof:
+
+        with instrumentation.stage("pii"):
+            ...
+
+    Snapshots are plain dicts, so process-pool workers can send theirs back
+    to be merged into the proof's instrumentation.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+
+    def _stats(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def stage(self, name: str) -> _StageTimer:
+        return _StageTimer(self._stats(name))
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Yields from `iterable`, timing each step (e.g. parsing the next item).
+        """
+        stats = self._stats(name)
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            stats.add(time.perf_counter() - started)
+            yield item
+
+    def merge(self, snapshot: Optional[Dict[str, Dict[str, Any]]]) -> None:
+        for name, stage_snapshot in (snapshot or {}).items():
+            self._stats(name).merge(stage_snapshot)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.snapshot() for name, stats in self.stages.items()}
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {name: stats.report() for name, stats in self.stages.items()}
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+class NullInstrumentation:
+    """
+    Drop-in for `Instrumentation` when it is switched off: every call is a
+    no-op returning shared objects, so instrumented code pays almost nothing.
+    """
+    enabled = False
+    _timer = _NullTimer()
+
+    def stage(self, name: str) -> _NullTimer:
+        return self._timer
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterable[T]:
+        return iterable
+
+    def merge(self, snapshot: Optional[Dict[str, Dict[str, Any]]]) -> None:
+        pass
+
+    def snapshot(self) -> None:
+        return None
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {}
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+def create_instrumentation():
+    return Instrumentation() if settings.INSTRUMENTATION_ENABLED else NULL_INSTRUMENTATION
+
+
+def emit_report(instrumentation, attributes: Dict[str, Any]) -> None:
+    """
+    Sends the stage report to INSTRUMENTATION_SINK: the proof `attributes`,
+    stderr, or a file that gets one JSON line per proof.
+    """
+    if not instrumentation.enabled:
+        return
+    report = instrumentation.report()
+    sink = settings.INSTRUMENTATION_SINK
+    if sink == "attributes":
+        attributes["instrumentation"] = report
+        return
+    line = json.dumps({"timestamp": time.time(), "stages": report})
+    if sink == "stderr":
+        print(line, file=sys.stderr)
+        return
+    try:
+        with open(sink, "a") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logging.warning(f"Could not write instrumentation to {sink}: {e}")
+
+
+# Only one cProfile profiler can be active per process
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profiling(output_path: str):
+    """
+    Profiles the block with cProfile and writes the stats to `output_path`
+    (pstats format; view with `python -m pstats` or snakeviz). A no-op when
+    the path is empty or another proof in the process is already profiled.
+    """
+    if not output_path or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+            logging.info(f"Wrote profile to {output_path}")
+    finally:
+        _profile_lock.release()
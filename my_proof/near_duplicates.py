@@ -0,0 +1,66 @@
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+
+
+def block_layout(threshold: int, blocks: int = 0) -> Tuple[List[Tuple[int, int]], List[Tuple[int, ...]]]:
+    """
+    Splits the fingerprint into `blocks` contiguous bit ranges (start, end) and
+    lists the block combinations that must be keyed so any two values within
+    `threshold` bits share the key of at least one combination.
+    """
+    if threshold < 0:
+        raise ValueError("threshold must be non-negative")
+    if blocks <= 0:
+        blocks = threshold + 1
+    if not threshold < blocks <= FINGERPRINT_BITS:
+        raise ValueError(f"blocks must be in ({threshold}, {FINGERPRINT_BITS}]")
+    bounds = [round(i * FINGERPRINT_BITS / blocks) for i in range(blocks + 1)]
+    return list(zip(bounds, bounds[1:])), list(combinations(range(blocks), blocks - threshold))
+
+
+class HammingIndex:
+    """
+    Finds stored 64-bit SimHash fingerprints within `threshold` bits of a query
+    without comparing it against every stored value.
+
+    Fingerprints are split into `blocks` contiguous bit blocks. Two values at
+    distance <= threshold differ in at most `threshold` blocks, so they agree
+    exactly on at least `blocks - threshold` of them. One table is kept per
+    combination of `blocks - threshold` blocks, keyed by those bits, and a
+    query is only compared with the values sharing its key in some table.
+
+    The default `blocks = threshold + 1` keeps threshold + 1 tables (16-bit
+    keys at threshold 3). More blocks means more tables but longer keys and
+    fewer candidates per lookup.
+    """
+    def __init__(self, threshold: int = 3, blocks: int = 0):
+        ranges, key_blocks = block_layout(threshold, blocks)
+        self.threshold = threshold
+        self.blocks = len(ranges)
+
+        block_masks = [((1 << (end - start)) - 1) << start for start, end in ranges]
+        self._key_masks = [sum(block_masks[i] for i in combo) for combo in key_blocks]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._key_masks]
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, fingerprint: int) -> None:
+        for mask, table in zip(self._key_masks, self._tables):
+            table.setdefault(fingerprint & mask, []).append(fingerprint)
+        self._count += 1
+
+    def find(self, fingerprint: int, threshold: Optional[int] = None) -> Optional[int]:
+        """
+        Returns a stored fingerprint within the threshold (or a smaller
+        `threshold` given here), or None.
+        """
+        limit = self.threshold if threshold is None else min(threshold, self.threshold)
+        for mask, table in zip(self._key_masks, self._tables):
+            for candidate in table.get(fingerprint & mask, ()):
+                if (candidate ^ fingerprint).bit_count() <= limit:
+                    return candidate
+        return None
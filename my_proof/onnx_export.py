@@ -0,0 +1,63 @@
+"""
+Exports the quality model for the ONNX Runtime backends.
+
+Writes the SentenceTransformer files (tokenizer and pooling config), the
+transformer as `model.onnx` and a dynamically int8-quantized `model_int8.onnx`
+into ONNX_MODEL_DIR. Needs torch and onnxruntime, so run it at image build
+time rather than inside the TEE:
+
+    pip install -r requirements.txt -r requirements-onnx.txt
+    python -m my_proof.onnx_export --output models/onnx
+"""
+import argparse
+import logging
+import os
+
+from .config import settings
+from .embedding_backends import ONNX_INT8_MODEL_FILE, ONNX_MODEL_FILE, load_sentence_transformer
+
+
+def export(output_dir: str, quantize: bool = True, opset: int = 14) -> None:
+    import torch
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = load_sentence_transformer()
+    model.save(output_dir)
+
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["Export sample text"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    logging.info(f"Exported {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        logging.info(f"Exported {int8_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 variant")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    export(args.output, quantize=not args.no_quantize, opset=args.opset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import settings
+from .instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from .models_llm import ChatTurn
+from .scorer import ChatScorer, LexicalScores
+
+# --- Worker-process state ---
+# Each worker builds a lexical-only scorer once: no embedding model or cache there.
+_worker_scorer: Optional[ChatScorer] = None
+
+
+def _init_worker() -> None:
+    global _worker_scorer
+    _worker_scorer = ChatScorer(lexical_only=True)
+
+
+def _score_lexical_chunk(texts: List[Tuple[str, str]],
+                         instrumented: bool = False) -> Tuple[List[LexicalScores], Optional[Dict[str, Any]]]:
+    # Stage timings are collected per chunk and merged in the parent process
+    instrumentation = Instrumentation() if instrumented else NULL_INSTRUMENTATION
+    turns = [ChatTurn.model_construct(user=user, bot=bot) for user, bot in texts]
+    scores = _worker_scorer.score_lexical_batch(turns, instrumentation)
+    return scores, instrumentation.snapshot()
+
+
+def _worker_ready() -> None:
+    pass
+
+
+class ParallelLexicalScorer:
+    """
+    Scores the CPU-bound lexical features of conversation chunks in a process
+    pool. Chunks are submitted through a bounded window, so memory stays
+    proportional to the worker count, and results come back in input order.
+    Long-running callers start one pool and pass it to every proof (see
+    `create_shared_pool`); `map` may be called from several threads at once.
+    """
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParallelLexicalScorer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> "ParallelLexicalScorer":
+        logging.info(f"Starting lexical scoring pool with {self.workers} workers")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        # Start every worker now rather than on the first chunks
+        for future in [self._executor.submit(_worker_ready) for _ in range(self.workers)]:
+            future.result()
+        return self
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def map(self, batches: Iterable[List[Tuple[int, ChatTurn]]],
+            instrumentation=NULL_INSTRUMENTATION) -> Iterator[Tuple[List[Tuple[int, ChatTurn]], List[LexicalScores]]]:
+        """
+        Yields each (index, turn) batch together with its lexical scores.
+        """
+        pending = deque()
+        max_pending = self.workers * 2
+        for batch in batches:
+            texts = [(turn.user, turn.bot) for _, turn in batch]
+            pending.append((batch, self._executor.submit(_score_lexical_chunk, texts, instrumentation.enabled)))
+            if len(pending) >= max_pending:
+                yield self._collect(*pending.popleft(), instrumentation)
+        while pending:
+            yield self._collect(*pending.popleft(), instrumentation)
+
+    @staticmethod
+    def _collect(batch, future, instrumentation):
+        scores, snapshot = future.result()
+        instrumentation.merge(snapshot)
+        return batch, scores
+
+
+def create_shared_pool() -> Optional[ParallelLexicalScorer]:
+    """
+    A started pool of SCORING_WORKERS processes for a long-running caller to
+    share across proofs, or None when lexical scoring is serial. Call it
+    before starting threads or loading the model, so the workers are forked
+    from a small, single-threaded process.
+    """
+    if settings.SCORING_WORKERS <= 1:
+        return None
+    return ParallelLexicalScorer(settings.SCORING_WORKERS).start()
@@ -0,0 +1,65 @@
+import re
+from typing import Dict, Iterable, List
+
+# Each pattern matches only a bounded prefix of what it detects: enough to
+# decide that a match exists, without the open-ended repetition that makes a
+# backtracking engine re-scan long runs from every start position.
+PII_PATTERNS: Dict[str, str] = {
+    # Finds exactly the texts `[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+`
+    # finds: a local part needs one character and the top-level domain one
+    # character. The domain run is only scanned from the `@` before it.
+    "email": r"[a-zA-Z0-9_.+-]@[a-zA-Z0-9-]+\.[a-zA-Z0-9.-]",
+    # Aadhaar numbers: 12 digits, optionally grouped 4-4-4, not starting with 0/1
+    "aadhaar": r"(?<![0-9])[2-9][0-9]{3}[ -]?[0-9]{4}[ -]?[0-9]{4}(?![0-9])",
+    # PAN: five letters, four digits, one letter
+    "pan": r"(?<![A-Z0-9])[A-Z]{5}[0-9]{4}[A-Z](?![A-Z0-9])",
+    # Finds exactly the texts the original phone pattern
+    # `(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?[\d\s-]{7,10}` finds: both
+    # groups are optional, so a match exists iff seven of [\d\s-] occur in a row
+    "phone": r"[\d\s-]{7}",
+}
+# Alternation order: the more specific patterns are tried first at a position
+DEFAULT_PII_CATEGORIES = ("email", "phone")
+
+
+class PiiScanner:
+    """
+    Detects PII of several categories with a single regex scan per text.
+
+    All enabled patterns are combined into one alternation of named groups,
+    so a text is scanned once however many categories are enabled. Every
+    alternative does bounded work per start position, which keeps the scan
+    linear in the text length even on adversarial input, e.g. long digit
+    tables or long runs of e-mail characters.
+    """
+    def __init__(self, categories: Iterable[str] = DEFAULT_PII_CATEGORIES):
+        categories = [category.strip() for category in categories if category.strip()]
+        unknown = [category for category in categories if category not in PII_PATTERNS]
+        if unknown:
+            raise ValueError(f"Unknown PII categories {unknown}; choose from {sorted(PII_PATTERNS)}")
+        # Keep PII_PATTERNS order so specific patterns win over `phone`
+        self.categories = [category for category in PII_PATTERNS if category in categories]
+        alternation = "|".join(f"(?P<{category}>{PII_PATTERNS[category]})" for category in self.categories)
+        self._search = re.compile(alternation).search if self.categories else None
+        # A zero-width lookahead is tried at every position, so matches of
+        # different categories can overlap
+        self._finditer = re.compile(f"(?=(?:{alternation}))").finditer if self.categories else None
+
+    def contains_pii(self, text: str) -> bool:
+        """
+        Whether any enabled category occurs; stops at the first match.
+        """
+        return self._search is not None and self._search(text) is not None
+
+    def find_categories(self, text: str) -> List[str]:
+        """
+        The enabled categories that occur in `text`, in PII_PATTERNS order.
+        """
+        if self._finditer is None:
+            return []
+        found = set()
+        for match in self._finditer(text):
+            found.add(match.lastgroup)
+            if len(found) == len(self.categories):
+                break
+        return [category for category in self.categories if category in found]
@@ -0,0 +1,117 @@
+"""
+Staged scoring: the stages of a proof run at the same time in their own
+threads, connected by bounded queues.
+
+    parse + validate  ->  lexical features  ->  quality (model)  ->  caller
+
+While the model embeds one batch, the next batches are parsed and their
+lexical features computed; the model call and most of NumPy release the
+GIL, so the stages overlap on a single proof without extra processes. A
+full queue blocks its producer, so at most `queue_size` items wait between
+two stages. Each stage is a single thread handling its input in order, so
+results come out in input order. An exception in any stage ends the
+pipeline and is raised again, unchanged, where the caller reads the results.
+"""
+import queue
+import threading
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+# Seconds a blocked stage waits before checking whether the pipeline was closed
+_POLL_INTERVAL_S = 0.1
+_DONE = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Pipeline:
+    """
+    Feeds `source` through `stages`, each a function from an iterator of
+    items to an iterator of results, one thread per stage plus one for the
+    source:
+
+        with Pipeline(batches, [lexical_stage, quality_stage], queue_size=4) as results:
+            for result in results:
+                ...
+
+    Leaving the block early stops every stage and waits for its thread, so
+    the source may be closed right after.
+    """
+    def __init__(self, source: Iterable[Any], stages: Sequence[Callable[[Iterator[Any]], Iterable[Any]]],
+                 queue_size: int = 4, name: str = "pipeline"):
+        self.source = source
+        self.stages = list(stages)
+        self.queue_size = max(queue_size, 1)
+        self.name = name
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def __enter__(self) -> Iterator[Any]:
+        output: queue.Queue = queue.Queue(self.queue_size)
+        self._start(f"{self.name}-source", lambda: self.source, output)
+        for position, stage in enumerate(self.stages):
+            stage_input, output = output, queue.Queue(self.queue_size)
+            self._start(f"{self.name}-{position}", partial(self._stage_results, stage, stage_input), output)
+        return self._drain(output)
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _start(self, name: str, items: Callable[[], Iterable[Any]], output: queue.Queue) -> None:
+        thread = threading.Thread(target=self._run, args=(items, output), name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _stage_results(self, stage: Callable[[Iterator[Any]], Iterable[Any]], stage_input: queue.Queue) -> Iterable[Any]:
+        return stage(self._drain(stage_input))
+
+    def _run(self, items: Callable[[], Iterable[Any]], output: queue.Queue) -> None:
+        iterator = None
+        try:
+            iterator = iter(items())
+            for item in iterator:
+                if not self._put(output, item):
+                    return
+        except BaseException as e:
+            self._put(output, _Failure(e))
+            return
+        finally:
+            # Generators are closed in the thread that ran them (e.g. to release a spool file)
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self._put(output, _DONE)
+
+    def _put(self, output: queue.Queue, item: Any) -> bool:
+        while not self._stopped.is_set():
+            try:
+                output.put(item, timeout=_POLL_INTERVAL_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _drain(self, stage_input: queue.Queue) -> Iterator[Any]:
+        while True:
+            try:
+                item = stage_input.get(timeout=_POLL_INTERVAL_S)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
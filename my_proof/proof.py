@@ -1,20 +1,81 @@
 import logging
 import json
-from typing import List, Any, Dict
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from itertools import islice
+from typing import List, Any, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
 import ijson
+import numpy as np
 
 from .config import settings
-from .models_llm import ChatTurn, ValidationResult, FinalProof
-from .scorer import ChatScorer
+from .embedding_cache import CacheStats
+from .hash_codec import COMPACT_KEY, DECIMAL_KEY, encode_fingerprints, to_decimal_strings
+from .incremental import IncrementalScoring
+from .instrumentation import create_instrumentation, emit_report, profiling
+from .aggregation import ProofAggregator
+from .models_llm import ChatTurn, FinalProof
+from .near_duplicates import HammingIndex
+from .parallel import ParallelLexicalScorer
+from .pipeline import Pipeline
+from .request_stream import ConversationStream
+from .scorer import ChatScorer, LexicalScores
+
+T = TypeVar("T")
+
+
+def _batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yields consecutive lists of at most `size` items without materialising the input."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, max(size, 1)))
+        if not batch:
+            return
+        yield batch
+
+
+def _to_turn(conv_json: Any) -> ChatTurn:
+    """
+    Builds a ChatTurn, skipping pydantic validation for the common case of a
+    dict with plain string `user` and `bot` values. Anything else goes through
+    the validating constructor, so invalid turns fail exactly as before.
+    """
+    if type(conv_json) is dict:
+        user, bot = conv_json.get("user"), conv_json.get("bot")
+        if type(user) is str and type(bot) is str:
+            return ChatTurn.model_construct(user=user, bot=bot)
+    return ChatTurn(**conv_json)
+
+
+def passes_lexical_checks(lexical: LexicalScores) -> bool:
+    """
+    The model-free part of a turn's validity: no PII, enough complexity and
+    (if MIN_TURN_WORDS is set) enough words.
+    """
+    return (lexical.is_pii_free and
+            lexical.complexity > settings.MIN_COMPLEXITY_SCORE and
+            lexical.word_count >= settings.MIN_TURN_WORDS)
+
 
 class RegionalLanguageProof:
     """
-    Orchestrates the entire data validation process for a single JSON file.
+    Orchestrates the entire data validation process for a single JSON file
+    or for any iterable/stream of turn dicts (e.g. a `ConversationStream`).
     """
-    def __init__(self, config: Dict[str, Any], data_file_path: str, uniqueness_hashes: List[str] = None):
+    def __init__(self, config: Dict[str, Any], data_file_path: Optional[str] = None, uniqueness_hashes: List[str] = None,
+                 conversations: Optional[Iterable[Dict[str, Any]]] = None, scorer: Optional[ChatScorer] = None,
+                 file_id: Optional[Any] = None, lexical_pool: Optional[ParallelLexicalScorer] = None):
+        if data_file_path is None and conversations is None:
+            raise ValueError("Either data_file_path or conversations must be provided")
         self.data_file_path = data_file_path
+        self.conversations = conversations
         self.config = config
-        self.scorer = ChatScorer()
+        # Key of the saved scoring state when INCREMENTAL_STATE_DIR is set
+        self.file_id = file_id
+        # A long-running caller can share one scorer (and its loaded model) across proofs
+        self._owns_scorer = scorer is None
+        self.scorer = scorer if scorer is not None else ChatScorer()
+        # ...and its lexical worker processes; otherwise each proof starts its own
+        self.lexical_pool = lexical_pool
         # Note: External uniqueness hashes are handled by frontend, not used for scoring
         self.external_uniqueness_hashes = set(uniqueness_hashes) if uniqueness_hashes else set()
 
@@ -22,60 +83,70 @@ class RegionalLanguageProof:
         """
         Processes the data file and generates the final proof JSON.
         """
+        self.instrumentation = create_instrumentation()
+        with profiling(settings.PROFILE_OUTPUT), self.instrumentation.stage("proof"):
+            final_proof = self._score_conversations()
+        emit_report(self.instrumentation, final_proof.attributes)
+        return final_proof
+
+    def _score_conversations(self) -> FinalProof:
         logging.info("Starting proof generation.")
 
-        validation_results: List[ValidationResult] = []
-        # --- RE-INTRODUCED UNIQUENESS TRACKING ---
-        all_fingerprints = set()
-        file_internal_duplicates = 0
-        all_word_count_scores = [] 
+        near_duplicate_index = None
+        if settings.NEAR_DUPLICATE_DETECTION:
+            near_duplicate_index = HammingIndex(settings.NEAR_DUPLICATE_THRESHOLD, settings.NEAR_DUPLICATE_BLOCKS)
+        # Running totals instead of per-turn objects, so memory does not grow with the file
+        aggregate = ProofAggregator(self.scorer.pii_scanner.categories, near_duplicate_index,
+                                    include_turn_details=settings.INCLUDE_TURN_DETAILS)
+        self.cache_stats = CacheStats()
+        self.quality_skipped = 0
+        incremental = None
+        if settings.INCREMENTAL_STATE_DIR and self.file_id is not None:
+            incremental = IncrementalScoring(settings.INCREMENTAL_STATE_DIR, self.file_id,
+                                             settings.INCREMENTAL_CHECKPOINT_TURNS)
 
         try:
-            with open(self.data_file_path, "rb") as f:
-                conversations = ijson.items(f, 'item')
-                for i, conv_json in enumerate(conversations):
-                    turn = ChatTurn(**conv_json)
-                    combined_text = f"{turn.user} {turn.bot}"
-                    
-                    is_pii_free = self.scorer.scrub_pii(combined_text)
-                    complexity = self.scorer.calculate_complexity(combined_text)
-                    quality = self.scorer.calculate_quality(turn)
-                    word_count_score = self.scorer.calculate_word_count_score(combined_text)
-                    
-                    all_word_count_scores.append(word_count_score)
-
-                    # --- CALCULATE AND CHECK UNIQUENESS HASH ---
-                    fingerprint = self.scorer.calculate_uniqueness_hash(turn)
-                    if fingerprint in all_fingerprints:
-                        file_internal_duplicates += 1
-                    all_fingerprints.add(fingerprint)
+            with self._open_conversations() as conversations:
+                start = 0
+                if incremental is not None:
+                    # Turns a matching saved state covers are skipped, not rescored
+                    conversations, state = incremental.resume(conversations, aggregate)
+                    if state is not None:
+                        start = state["turns"]
+                        self.quality_skipped = state["quality_skipped"]
+                turns = self._validated_turns(conversations)
+                for i, lexical, quality in self._iter_scored_turns(turns, start):
+                    aggregate.add_turn(lexical)
+                    if quality is None:
+                        # The cascade did not send this turn to the model
+                        self.quality_skipped += 1
 
                     # Add conversation to the valid list if it passes basic checks
-                    if (is_pii_free and 
-                        complexity > settings.MIN_COMPLEXITY_SCORE and 
+                    # (quality is None when the cascade skipped the model for it)
+                    if (passes_lexical_checks(lexical) and
+                        quality is not None and
                         quality > settings.MIN_QUALITY_SCORE):
-                        
-                        validation_results.append(
-                            ValidationResult(
-                                conversation_index=i,
-                                complexity_score=complexity,
-                                quality_score=quality,
-                                uniqueness_hash=fingerprint, # Store the hash per result
-                                is_pii_free=is_pii_free,
-                            )
-                        )
+                        aggregate.add_valid(i, lexical, quality)
+                    if incremental is not None:
+                        incremental.checkpoint(aggregate, self.quality_skipped)
+            if incremental is not None:
+                incremental.checkpoint(aggregate, self.quality_skipped, final=True)
         except (ijson.JSONError, json.JSONDecodeError) as e:
             return self.create_error_proof(f"Invalid JSON format: {e}")
         except Exception as e:
             return self.create_error_proof(f"An unexpected error occurred: {e}")
+        finally:
+            # Shared scorers are flushed by their owner, not after every proof
+            if self._owns_scorer and self.scorer.embedding_cache is not None:
+                self.scorer.embedding_cache.flush()
 
-        if not validation_results:
+        if not aggregate.valid_count:
             return self.create_error_proof("No valid conversations found.")
 
         # --- UPDATED FINAL SCORE CALCULATION WITH UNIQUENESS ---
-        final_quality = sum(r.quality_score for r in validation_results) / len(validation_results)
+        final_quality = aggregate.average_quality
         
-        total_conversations = len(all_fingerprints)
+        total_conversations = len(aggregate.fingerprints)
         # Calculate intra-file uniqueness score
         # --- INTRA-FILE UNIQUENESS CALCULATION ONLY ---
         # Only check for duplicates within the current file/request
@@ -83,47 +154,172 @@ class RegionalLanguageProof:
             final_uniqueness = 0.0
         else:
             # Uniqueness is the ratio of unique conversations to total conversations
-            # Only penalize internal duplicates within this request
-            unique_conversations = total_conversations - file_internal_duplicates
+            # Only penalize internal duplicates (and near duplicates) within this request
+            unique_conversations = total_conversations - aggregate.duplicates - aggregate.near_duplicates
             final_uniqueness = max(0.0, unique_conversations / total_conversations)
 
         
-        final_word_count_score = sum(all_word_count_scores) / len(all_word_count_scores) if all_word_count_scores else 0
+        final_word_count_score = aggregate.average_word_count_score
 
         # The final score is now a blend of quality, uniqueness, and word count
         # Improved weights: 40% quality, 40% uniqueness, 20% word count
         final_score = (0.4 * final_quality) + (0.4 * final_uniqueness) + (0.2 * final_word_count_score)
-        is_valid = final_score > 0.5 and len(validation_results) > 0
+        is_valid = final_score > 0.5 and aggregate.valid_count > 0
 
         logging.info("Proof generation successful.")
 
+        attributes = {
+            "total_conversations_processed": total_conversations,
+            "valid_conversations_count": aggregate.valid_count,
+            "file_internal_duplicates": aggregate.duplicates,
+            "unique_fingerprints_count": len(aggregate.fingerprints),
+            "average_word_count_score": final_word_count_score,
+            "final_quality_score": final_quality,
+            "final_uniqueness_score": final_uniqueness,
+            "min_quality_threshold": settings.MIN_QUALITY_SCORE,
+            "min_complexity_threshold": settings.MIN_COMPLEXITY_SCORE,
+            "target_word_count": settings.TARGET_WORD_COUNT,
+            "pii_category_counts": aggregate.pii_category_counts,
+        }
+        if near_duplicate_index is not None:
+            attributes["file_internal_near_duplicates"] = aggregate.near_duplicates
+            attributes["near_duplicate_threshold"] = settings.NEAR_DUPLICATE_THRESHOLD
+        if self.scorer.embedding_cache is not None:
+            attributes["embedding_cache_hits"] = self.cache_stats.hits
+            attributes["embedding_cache_misses"] = self.cache_stats.misses
+        if settings.QUALITY_CASCADE:
+            attributes["quality_skipped_count"] = self.quality_skipped
+        if settings.MIN_TURN_WORDS:
+            attributes["min_turn_words"] = settings.MIN_TURN_WORDS
+        if aggregate.turn_details is not None:
+            attributes["valid_conversations"] = aggregate.turn_details.to_dict()
+
         return FinalProof(
             valid=is_valid,
             score=final_score,
             quality=final_quality,
             uniqueness=final_uniqueness, # Report the calculated uniqueness
-            attributes={
-                "total_conversations_processed": total_conversations,
-                "valid_conversations_count": len(validation_results),
-                "file_internal_duplicates": file_internal_duplicates,
-                "unique_fingerprints_count": len(all_fingerprints),
-                "average_word_count_score": final_word_count_score,
-                "final_quality_score": final_quality,
-                "final_uniqueness_score": final_uniqueness,
-                "min_quality_threshold": settings.MIN_QUALITY_SCORE,
-                "min_complexity_threshold": settings.MIN_COMPLEXITY_SCORE,
-                "target_word_count": settings.TARGET_WORD_COUNT,
-            },
+            attributes=attributes,
             # Provide all fingerprints for the higher-level Inter-File check
-            metadata={
-                "all_uniqueness_hashes": list(sorted(all_fingerprints))
-            }
+            metadata=self._uniqueness_metadata(aggregate.fingerprints.to_array())
         )
         
-    def create_error_proof(self, error_message: str) -> FinalProof:
+    @staticmethod
+    def _uniqueness_metadata(fingerprints: np.ndarray) -> Dict[str, Any]:
+        if settings.UNIQUENESS_HASH_ENCODING == "compact":
+            return {COMPACT_KEY: encode_fingerprints(fingerprints)}
+        return {DECIMAL_KEY: to_decimal_strings(fingerprints)}
+
+    @contextmanager
+    def _open_conversations(self) -> Iterator[Iterable[Dict[str, Any]]]:
+        if self.conversations is not None:
+            yield self.conversations
+            return
+        with open(self.data_file_path, "rb") as f:
+            yield ijson.items(f, 'item')
+
+    def _validated_turns(self, conversations: Iterable[Dict[str, Any]]) -> Iterator[ChatTurn]:
+        for conv_json in self.instrumentation.iterate("parse", conversations):
+            with self.instrumentation.stage("validate"):
+                turn = _to_turn(conv_json)
+            yield turn
+
+    def _iter_scored_turns(self, turns: Iterable[ChatTurn],
+                           start: int = 0) -> Iterator[Tuple[int, LexicalScores, Optional[float]]]:
+        """
+        Yields (conversation_index, lexical scores, quality) for every turn, in
+        input order; indexes count from `start`.
+        Lexical features run in a process pool (the shared `lexical_pool`, or
+        one for this proof when SCORING_WORKERS > 1); the
+        embedding model always runs in this process, one call per batch. With
+        PIPELINE_ENABLED, parsing, lexical features and the model run at the
+        same time in their own threads (see my_proof.pipeline).
+        """
+        batches = _batched(enumerate(turns, start), settings.QUALITY_BATCH_SIZE)
+        with ExitStack() as stack:
+            pool = self.lexical_pool
+            if pool is None and settings.SCORING_WORKERS > 1:
+                pool = stack.enter_context(ParallelLexicalScorer(settings.SCORING_WORKERS))
+            if pool is not None:
+                lexical_stage = partial(pool.map, instrumentation=self.instrumentation)
+            else:
+                lexical_stage = self._lexical_batches
+            if settings.PIPELINE_ENABLED:
+                scored_batches = stack.enter_context(
+                    Pipeline(batches, [lexical_stage, self._quality_batches], settings.PIPELINE_QUEUE_SIZE))
+            else:
+                scored_batches = self._quality_batches(lexical_stage(batches))
+            for batch, lexical_scores, qualities in scored_batches:
+                for (i, _), lexical, quality in zip(batch, lexical_scores, qualities):
+                    yield i, lexical, quality
+
+    def _lexical_batches(self, batches: Iterable[List[Tuple[int, ChatTurn]]]):
+        for batch in batches:
+            yield batch, self.scorer.score_lexical_batch([turn for _, turn in batch], self.instrumentation)
+
+    def _quality_batches(self, lexical_batches):
+        """
+        Adds the quality of every turn of each lexical batch (None for turns
+        the cascade kept from the model).
+        """
+        for batch, lexical_scores in lexical_batches:
+            if settings.QUALITY_CASCADE:
+                # Turns that already failed a cheap check never reach the model
+                positions = [p for p, lexical in enumerate(lexical_scores) if passes_lexical_checks(lexical)]
+            else:
+                positions = range(len(batch))
+            qualities: List[Optional[float]] = [None] * len(batch)
+            # One model call embeds every user/bot text of the batch
+            scored = self.scorer.calculate_quality_batch([batch[p][1] for p in positions], self.cache_stats,
+                                                         self.instrumentation)
+            for p, quality in zip(positions, scored):
+                qualities[p] = quality
+            yield batch, lexical_scores, qualities
+
+    @staticmethod
+    def create_error_proof(error_message: str) -> FinalProof:
         """Creates a proof object for a failed validation."""
         return FinalProof(
             valid=False, score=0.0, quality=0.0, uniqueness=0.0,
             attributes={"error": error_message},
             metadata={}
-        )
\ No newline at end of file
+        )
+
+
+def generate_proof_from_stream(config: Dict[str, Any], request: ConversationStream,
+                               scorer: Optional[ChatScorer] = None,
+                               lexical_pool: Optional[ParallelLexicalScorer] = None) -> FinalProof:
+    """
+    Scores the turns of a stream as they are parsed, then captures any
+    top-level fields that followed them into `config`.
+    """
+    # Parsing up to the first turn also captures the request fields that precede it
+    request.has_conversations()
+    file_id = request.fields.get("file_id", config.get("file_id"))
+    proof_generator = RegionalLanguageProof(config=config, conversations=request, scorer=scorer, file_id=file_id,
+                                            lexical_pool=lexical_pool)
+    final_proof = proof_generator.generate_proof()
+    try:
+        request.finish()
+    except ijson.JSONError:
+        pass  # Malformed input is already reported in the error proof
+    for field, value in request.fields.items():
+        config[field] = value
+    logging.info(f"Processed {request.count} conversations")
+    logging.info(f"Received {len(request.uniqueness_hashes)} uniqueness hashes")
+    if settings.FINGERPRINT_STORE_DIR and request.uniqueness_hashes:
+        record_uniqueness_hashes(request.uniqueness_hashes)
+    return final_proof
+
+
+def record_uniqueness_hashes(uniqueness_hashes: List[str]) -> None:
+    """
+    Adds the fingerprints a request carried to the global fingerprint store.
+    """
+    from .fingerprint_store import open_shared_store
+    try:
+        added = open_shared_store(settings.FINGERPRINT_STORE_DIR).add(uniqueness_hashes)
+    except (ValueError, OverflowError) as e:
+        logging.warning(f"Ignoring uniqueness hashes that are not 64-bit fingerprints: {e}")
+        return
+    logging.info(f"Recorded {added} new fingerprints in the global store")
@@ -0,0 +1,101 @@
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import ijson
+
+# Top-level scalar fields of a TEE request that are carried into the proof config
+REQUEST_FIELDS = ("job_id", "file_id", "nonce")
+SCALAR_EVENTS = ("string", "number", "boolean", "null")
+
+
+class ConversationStream:
+    """
+    Incrementally parses a conversation payload so turns can be scored while
+    the input is still being read, without ever holding the whole file.
+
+    Two layouts are accepted:
+      - a top-level list of turns (the `input/data.json` layout), and
+      - an object with a `conversations` list plus optional `uniqueness_hashes`
+        and TEE request fields (`job_id`, `file_id`, `nonce`).
+
+    In TEE format only the object layout is accepted and each turn's
+    `prompt`/`answer` keys are mapped to `user`/`bot` on the fly. Top-level
+    fields are collected into `fields` and `uniqueness_hashes` as the parser
+    passes them; call `finish()` to also capture those after the turns.
+    """
+    def __init__(self, stream: BinaryIO, tee_format: bool = False):
+        self.tee_format = tee_format
+        self.fields: Dict[str, Any] = {}
+        self.uniqueness_hashes: List[Any] = []
+        self.count = 0
+        self._events = ijson.parse(stream, use_float=True)
+        self._top_level_list = False
+        self._pending: Optional[Any] = None
+        self._exhausted = False
+
+    def has_conversations(self) -> bool:
+        """
+        Parses up to the first turn; False if the payload contains none.
+        """
+        if self._pending is None and not self._exhausted:
+            self._pending = self._next_conversation()
+        return self._pending is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            if self._pending is not None:
+                conversation, self._pending = self._pending, None
+            elif self._exhausted:
+                return
+            else:
+                conversation = self._next_conversation()
+                if conversation is None:
+                    return
+            self.count += 1
+            yield self._to_turn(conversation)
+
+    def finish(self) -> None:
+        """
+        Consumes the rest of the payload so trailing top-level fields are captured.
+        """
+        while not self._exhausted:
+            self._next_conversation()
+
+    def _is_conversation(self, prefix: str) -> bool:
+        if prefix == "conversations.item":
+            return True
+        return prefix == "item" and self._top_level_list
+
+    def _next_conversation(self) -> Optional[Any]:
+        for prefix, event, value in self._events:
+            if prefix == "" and event == "start_array":
+                self._top_level_list = not self.tee_format
+            elif self._is_conversation(prefix):
+                if event in SCALAR_EVENTS:
+                    return value
+                if event in ("start_map", "start_array"):
+                    return self._build(event, value)
+            elif prefix == "uniqueness_hashes.item" and event in SCALAR_EVENTS:
+                self.uniqueness_hashes.append(value)
+            elif prefix in REQUEST_FIELDS and event in SCALAR_EVENTS:
+                self.fields[prefix] = value
+        self._exhausted = True
+        return None
+
+    def _build(self, event: str, value: Any) -> Any:
+        builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        depth = 1
+        for _, event, value in self._events:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    break
+        return builder.value
+
+    def _to_turn(self, conversation: Any) -> Any:
+        if self.tee_format and isinstance(conversation, dict):
+            return {"user": conversation.get("prompt", ""), "bot": conversation.get("answer", "")}
+        return conversation
@@ -1,20 +1,64 @@
-import re
-from nltk.tokenize import word_tokenize
-from sentence_transformers import SentenceTransformer, util
-from simhash import Simhash
-import torch
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import numpy as np
+
+from .analysis import AnalyzedText
 from .config import settings
+from .embedding_backends import EmbeddingBackend, create_backend
+from .embedding_cache import CacheStats, EmbeddingCache
+from .instrumentation import NULL_INSTRUMENTATION
 from .models_llm import ChatTurn
+from .pii import PiiScanner
+from .simhash_batch import batch_fingerprints
+
+class LexicalScores(NamedTuple):
+    """
+    The model-free scores of a single turn.
+    """
+    is_pii_free: bool
+    complexity: float
+    word_count_score: float
+    fingerprint: int
+    word_count: int
+    pii_categories: Tuple[str, ...] = ()
 
 class ChatScorer:
     """
     Encapsulates all the logic for PII scrubbing and scoring of chat data.
     """
-    def __init__(self):
-        self.model = SentenceTransformer(settings.SENTENCE_TRANSFORMER_MODEL)
-        self.email_regex = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
-        self.phone_regex = re.compile(r"(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)?[\d\s-]{7,10}")
+    def __init__(self, lexical_only: bool = False):
+        # A lexical-only scorer (e.g. a pool worker) never embeds: it opens no
+        # embedding cache and cannot load the model
+        self.lexical_only = lexical_only
+        self._backend: Optional[EmbeddingBackend] = None
+        # Function used to embed texts; a server may swap in a micro-batching wrapper
+        self.encoder: Callable[[List[str]], np.ndarray] = self.encode_with_model
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if settings.EMBEDDING_CACHE_ENABLED and not lexical_only:
+            # Backends produce slightly different vectors, so each gets its own keys
+            self.embedding_cache = EmbeddingCache(
+                f"{settings.SENTENCE_TRANSFORMER_MODEL}@{settings.EMBEDDING_BACKEND}",
+                directory=settings.EMBEDDING_CACHE_DIR,
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+                flush_interval_s=settings.EMBEDDING_CACHE_FLUSH_INTERVAL_S,
+            )
+        self.pii_scanner = PiiScanner(settings.PII_CATEGORIES.split(","))
+
+    @property
+    def backend(self) -> EmbeddingBackend:
+        # Loaded on first use, so a scorer that only computes lexical scores never pays for it
+        if self._backend is None:
+            if self.lexical_only:
+                raise RuntimeError("A lexical-only scorer has no embedding backend")
+            self._backend = create_backend(settings.EMBEDDING_BACKEND)
+        return self._backend
+
+    def analyze(self, turn: ChatTurn) -> AnalyzedText:
+        """
+        Tokenizes a turn once so all lexical scores can share the result.
+        """
+        return AnalyzedText(f"{turn.user} {turn.bot}")
 
     # --- ADD THIS FUNCTION ---
     def calculate_word_count_score(self, text: str) -> float:
@@ -22,30 +66,136 @@ class ChatScorer:
         Calculates a normalized score based on the word count.
         The score is capped at 1.0.
         """
-        word_count = len(word_tokenize(text))
+        return self.word_count_score_from_analysis(AnalyzedText(text))
+
+    def word_count_score_from_analysis(self, analyzed: AnalyzedText) -> float:
         # Normalize score based on the target, capping at 1.0
-        score = min(word_count / settings.TARGET_WORD_COUNT, 1.0)
+        score = min(analyzed.word_count / settings.TARGET_WORD_COUNT, 1.0)
         return score
 
     def scrub_pii(self, text: str) -> bool:
-        if self.email_regex.search(text) or self.phone_regex.search(text):
-            return False
-        return True
+        return not self.pii_scanner.contains_pii(text)
 
     def calculate_complexity(self, text: str) -> float:
-        tokens = word_tokenize(text.lower())
+        return self.complexity_from_analysis(AnalyzedText(text))
+
+    def complexity_from_analysis(self, analyzed: AnalyzedText) -> float:
+        tokens = analyzed.lower_tokens
         if not tokens:
             return 0.0
-        lexical_diversity = len(set(tokens)) / len(tokens) if tokens else 0.0
-        avg_word_length = sum(len(word) for word in tokens) / len(tokens) if tokens else 0.0
+        lexical_diversity = len(set(tokens)) / len(tokens)
+        avg_word_length = sum(analyzed.token_lengths) / len(tokens)
         score = (0.6 * lexical_diversity) + (0.4 * (avg_word_length / 10))
         return min(score, 1.0)
 
     def calculate_quality(self, turn: ChatTurn) -> float:
-        embeddings = self.model.encode([turn.user, turn.bot], convert_to_tensor=True)
-        cosine_scores = util.cos_sim(embeddings[0], embeddings[1])
-        return cosine_scores.item()
+        return self.calculate_quality_batch([turn])[0]
+
+    def calculate_quality_batch(self, turns: List[ChatTurn], cache_stats: Optional[CacheStats] = None,
+                                instrumentation=NULL_INSTRUMENTATION) -> List[float]:
+        """
+        Calculates the quality score of many turns with a single model call.
+        All user and bot texts are encoded together (every backend length-sorts
+        its input, so each forward pass pads to similar lengths) and the
+        user/bot cosine similarities are computed row-wise.
+        """
+        if not turns:
+            return []
+        with instrumentation.stage("quality"):
+            texts = [turn.user for turn in turns] + [turn.bot for turn in turns]
+            embeddings = self.embed(texts, cache_stats, instrumentation)
+            user_embeddings = embeddings[:len(turns)]
+            bot_embeddings = embeddings[len(turns):]
+            return np.einsum("ij,ij->i", user_embeddings, bot_embeddings).tolist()
+
+    def embed(self, texts: List[str], cache_stats: Optional[CacheStats] = None,
+              instrumentation=NULL_INSTRUMENTATION) -> np.ndarray:
+        """
+        Returns unit-normalized embeddings, encoding only the texts the
+        embedding cache (if enabled) does not already hold.
+        """
+        if self.embedding_cache is None:
+            with instrumentation.stage("encode"):
+                return self.encoder(texts)
+
+        vectors = self.embedding_cache.get_many(texts)
+        # Encode each distinct missing text once, even if it repeats in the batch
+        missing: Dict[str, List[int]] = {}
+        for position, (text, vector) in enumerate(zip(texts, vectors)):
+            if vector is None:
+                missing.setdefault(text, []).append(position)
+        if missing:
+            missing_texts = list(missing)
+            with instrumentation.stage("encode"):
+                encoded = self.encoder(missing_texts)
+            self.embedding_cache.put_many(missing_texts, encoded)
+            for text, vector in zip(missing_texts, encoded):
+                for position in missing[text]:
+                    vectors[position] = vector
+        if cache_stats is not None:
+            cache_stats.misses += len(missing)
+            cache_stats.hits += len(texts) - len(missing)
+
+        # Cached vectors are float16; round fresh ones the same way so a score
+        # never depends on whether its texts were cache hits.
+        embeddings = np.stack(vectors).astype(np.float16).astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def encode_with_model(self, texts: List[str]) -> np.ndarray:
+        return self.backend.encode(texts)
 
     def calculate_uniqueness_hash(self, turn: ChatTurn) -> str:
-        combined_text = f"{turn.user} {turn.bot}"
-        return str(Simhash(combined_text).value)
\ No newline at end of file
+        return self.uniqueness_hash_from_analysis(self.analyze(turn))
+
+    def uniqueness_hash_from_analysis(self, analyzed: AnalyzedText) -> str:
+        return str(self.fingerprint_from_analysis(analyzed))
+
+    def fingerprint_from_analysis(self, analyzed: AnalyzedText) -> int:
+        return self.fingerprints_from_analyses([analyzed])[0]
+
+    def fingerprints_from_analyses(self, analyses: List[AnalyzedText]) -> List[int]:
+        # In the default "compat" mode these equal Simhash(text).value
+        return batch_fingerprints(analyses, settings.SIMHASH_MODE).tolist()
+
+    def score_lexical(self, turn: ChatTurn, instrumentation=NULL_INSTRUMENTATION) -> LexicalScores:
+        """
+        Computes every score of a turn that does not need the embedding model.
+        """
+        return self.score_lexical_batch([turn], instrumentation)[0]
+
+    def score_lexical_batch(self, turns: List[ChatTurn], instrumentation=NULL_INSTRUMENTATION) -> List[LexicalScores]:
+        """
+        Computes the model-free scores of many turns; their SimHash
+        fingerprints are computed together in one vectorized pass.
+        """
+        analyses = []
+        partial_scores = []
+        for turn in turns:
+            # "lexical" spans a turn's per-turn work; the nested stages break it down
+            with instrumentation.stage("lexical"):
+                analyzed = self.analyze(turn)
+                with instrumentation.stage("pii"):
+                    pii_categories = tuple(self.pii_scanner.find_categories(analyzed.text))
+                with instrumentation.stage("tokenize"):
+                    analyzed.tokens
+                with instrumentation.stage("complexity"):
+                    complexity = self.complexity_from_analysis(analyzed)
+                with instrumentation.stage("word_count"):
+                    word_count_score = self.word_count_score_from_analysis(analyzed)
+            analyses.append(analyzed)
+            partial_scores.append((pii_categories, complexity, word_count_score))
+        with instrumentation.stage("simhash"):
+            fingerprints = self.fingerprints_from_analyses(analyses)
+        return [
+            LexicalScores(
+                is_pii_free=not pii_categories,
+                complexity=complexity,
+                word_count_score=word_count_score,
+                fingerprint=fingerprint,
+                word_count=analyzed.word_count,
+                pii_categories=pii_categories,
+            )
+            for analyzed, (pii_categories, complexity, word_count_score), fingerprint
+            in zip(analyses, partial_scores, fingerprints)
+        ]
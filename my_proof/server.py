@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import ijson
+import numpy as np
+
+from .__main__ import load_config
+from .config import settings
+from .hash_codec import proof_json
+from .models_llm import FinalProof
+from .parallel import ParallelLexicalScorer, create_shared_pool
+from .proof import RegionalLanguageProof, generate_proof_from_stream
+from .request_stream import ConversationStream
+from .scorer import ChatScorer
+
+
+class EmbeddingBatcher:
+    """
+    Merges `encode` calls from concurrent request threads into larger model
+    calls. The first waiting call opens a batch that collects further calls
+    for at most `max_wait_ms` or until `max_texts` texts are queued; a single
+    background thread owns the model, so it is never entered concurrently.
+    """
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_texts: int, max_wait_ms: float):
+        self._encode = encode
+        self.max_texts = max_texts
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            total = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while total < self.max_texts:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Let the outer loop stop after this batch
+                    break
+                pending.append(item)
+                total += len(item[0])
+
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                embeddings = self._encode(texts)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future in pending:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+@contextmanager
+def warm_scoring() -> Iterator[Tuple[ChatScorer, Optional[ParallelLexicalScorer]]]:
+    """
+    The shared state of a process that scores many proofs (the server and
+    batch mode): the lexical worker pool when SCORING_WORKERS > 1, and a
+    scorer whose model is loaded up front and whose embedding calls go through
+    an EmbeddingBatcher. On exit the batcher and pool are shut down and the
+    embedding cache is flushed; SIGTERM raises KeyboardInterrupt meanwhile, so
+    a stopped process exits through the same path.
+    """
+    # Lexical workers are forked first, while the process is still small and single-threaded
+    lexical_pool = create_shared_pool()
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        scorer = ChatScorer()
+        started = time.perf_counter()
+        scorer.encode_with_model(["warm-up"])
+        logging.info(f"Model loaded in {time.perf_counter() - started:.2f}s")
+        batcher = EmbeddingBatcher(scorer.encoder, settings.SERVER_BATCH_MAX_TEXTS, settings.SERVER_BATCH_WAIT_MS)
+        scorer.encoder = batcher.encode
+        try:
+            yield scorer, lexical_pool
+        finally:
+            batcher.close()
+            if scorer.embedding_cache is not None:
+                scorer.embedding_cache.flush()
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGTERM, previous_handler)
+        if lexical_pool is not None:
+            lexical_pool.close()
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+class _BoundedReader:
+    """
+    File-like view of the first `length` bytes of a request body, so the JSON
+    stream parser never blocks waiting on a keep-alive connection.
+    """
+    def __init__(self, raw, length: int):
+        self.raw = raw
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+class ProofRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /proof accepts the TEE request JSON and answers with the FinalProof
+    JSON the CLI would print. GET /health reports readiness.
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "NativyaProofServer/1.0"
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix-socket"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"{self.address_string()} - {format % args}")
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, json.dumps({"status": "ok"}))
+        else:
+            self._send_json(404, json.dumps({"error": "Not found"}))
+
+    def do_POST(self) -> None:
+        if self.path != "/proof":
+            self.close_connection = True
+            self._send_json(404, json.dumps({"error": "Not found"}))
+            return
+        length_header = self.headers.get("Content-Length")
+        if length_header is None:
+            self.close_connection = True
+            self._send_json(411, json.dumps({"error": "Content-Length required"}))
+            return
+        try:
+            length = int(length_header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._send_json(400, json.dumps({"error": "Invalid Content-Length"}))
+            return
+
+        slots: threading.BoundedSemaphore = self.server.request_slots
+        if not slots.acquire(timeout=settings.SERVER_QUEUE_TIMEOUT_S):
+            self.close_connection = True
+            self._send_json(503, json.dumps({"error": "Server busy"}))
+            return
+        body = _BoundedReader(self.rfile, length)
+        try:
+            status, proof = self._generate(body)
+        finally:
+            slots.release()
+        if body.remaining > 0:
+            # The body was not fully consumed; the connection cannot be reused
+            self.close_connection = True
+        self._send_json(status, proof_json(proof))
+
+    def _generate(self, body: _BoundedReader) -> Tuple[int, FinalProof]:
+        config = dict(self.server.base_config)
+        request = ConversationStream(body, tee_format=True)
+        try:
+            if not request.has_conversations():
+                return 400, RegionalLanguageProof.create_error_proof("No conversations in request")
+        except ijson.JSONError as e:
+            return 400, RegionalLanguageProof.create_error_proof(f"Invalid JSON format: {e}")
+        proof = generate_proof_from_stream(config, request, scorer=self.server.scorer,
+                                           lexical_pool=self.server.lexical_pool)
+        logging.info(f"Proof for job {config.get('job_id')}: Valid={proof.valid}, Score={proof.score:.3f}")
+        return 200, proof
+
+    def _send_json(self, status: int, body: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(scorer: ChatScorer, base_config: Dict[str, Any], host: str = "", port: int = 0,
+                  unix_socket: str = "", lexical_pool: Optional[ParallelLexicalScorer] = None) -> socketserver.BaseServer:
+    """
+    Builds a threaded HTTP server (TCP, or a Unix socket when `unix_socket`
+    is given) that scores requests with the shared, already loaded `scorer`
+    and, if given, the shared lexical worker pool.
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, ProofRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ProofRequestHandler)
+    server.scorer = scorer
+    server.lexical_pool = lexical_pool
+    server.base_config = base_config
+    server.request_slots = threading.BoundedSemaphore(max(settings.SERVER_MAX_CONCURRENCY, 1))
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve proofs from a warm, long-running process.")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--unix-socket", default=settings.SERVER_UNIX_SOCKET,
+                        help="Listen on this Unix socket path instead of TCP")
+    args = parser.parse_args()
+
+    with warm_scoring() as (scorer, lexical_pool):
+        server = create_server(scorer, load_config(), args.host, args.port, args.unix_socket, lexical_pool)
+        address = args.unix_socket or f"{args.host}:{args.port}"
+        logging.info(f"Proof server listening on {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Shutting down proof server")
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
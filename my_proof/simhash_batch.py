@@ -0,0 +1,222 @@
+"""
+SimHash fingerprints of many turns at once, with NumPy.
+
+The `simhash` package builds one object per text, cuts it into shingles
+(4-character windows of its letters), hashes each shingle with MD5 and sums
+their 64 hash bits in Python. Here the shingles of a whole chunk of turns
+are cut with array indexing, and the feature hashes of the chunk form one
+uint64 array. For each of the 8 hash bytes, one `np.bincount` gives every
+turn's weight per byte value. A 256 x 8 bit table then turns these totals
+into the turn's bit sums, exact in float64. Texts repeating a shingle more
+than 255 times make the package itself fail under NumPy 2 (it multiplies
+uint8 bits by the weight); for them the exact sums give the value it
+returns under NumPy 1.
+
+Two modes (SIMHASH_MODE):
+  - "compat": the same values as `Simhash(text).value`, bit for bit, so
+    fingerprints already held by the global service stay comparable.
+    Shingles of the Basic Multilingual Plane pack exactly into 64-bit keys,
+    and their MD5 hashes are cached in sorted arrays, so a shingle seen
+    before costs a binary search. Only new shingles are decoded and hashed.
+  - "fast": the same shingles, hashed with a vectorized 64-bit mixer
+    instead of MD5. These fingerprints are NOT comparable with compat ones;
+    use a separate global store for them.
+"""
+import hashlib
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .analysis import SIMHASH_LETTER_REGEX, SIMHASH_SHINGLE_WIDTH, AnalyzedText
+
+SIMHASH_MODES = ("compat", "fast")
+# Feature hashes kept between calls; a cache is emptied when it grows past this
+FEATURE_HASH_CACHE_SIZE = 1 << 20
+
+# Row b holds the bits of byte value b, most significant first
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float64)
+
+
+def _md5_hash(feature: str) -> int:
+    # The package keeps the last 8 bytes of the digest, read big-endian
+    return int.from_bytes(hashlib.md5(feature.encode("utf-8")).digest()[-8:], "big")
+
+
+class _PackedHashCache:
+    """
+    MD5 hashes of shingles keyed by their packed 64-bit code points: a sorted
+    key array searched with `np.searchsorted`, plus a dict of recent
+    additions merged into it once it holds an eighth of the array. Lookups
+    read the arrays without locking; batch and server threads share the cache.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # Sorted keys and their hashes, replaced together
+        self._table = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64))
+        self._recent: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def hashes(self, keys: np.ndarray, features_of: Callable[[np.ndarray], List[str]]) -> np.ndarray:
+        """
+        The hashes of `keys`. `features_of` decodes the shingles at the given
+        positions of `keys`; it is only called for keys never seen before.
+        """
+        table_keys, table_hashes = self._table
+        positions = np.searchsorted(table_keys, keys)
+        found = positions < len(table_keys)
+        found[found] = table_keys[positions[found]] == keys[found]
+        result = np.empty(len(keys), dtype=np.uint64)
+        result[found] = table_hashes[positions[found]]
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            missing_keys = keys[missing].tolist()
+            with self._lock:
+                recent = self._recent
+                values = [recent.get(key) for key in missing_keys]
+                unknown = [i for i, value in enumerate(values) if value is None]
+                if unknown:
+                    for i, feature in zip(unknown, features_of(missing[unknown])):
+                        values[i] = recent[missing_keys[i]] = _md5_hash(feature)
+                if len(recent) >= max(len(self._table[0]) // 8, 4096):
+                    self._merge()
+            result[missing] = np.array(values, dtype=np.uint64)
+        return result
+
+    def _merge(self) -> None:
+        recent = self._recent
+        keys = np.fromiter(recent.keys(), dtype=np.uint64, count=len(recent))
+        hashes = np.fromiter(recent.values(), dtype=np.uint64, count=len(recent))
+        table_keys, table_hashes = self._table
+        if len(table_keys) + len(keys) <= self.max_entries:
+            keys = np.concatenate([table_keys, keys])
+            hashes = np.concatenate([table_hashes, hashes])
+        order = np.argsort(keys, kind="stable")
+        self._table = (keys[order], hashes[order])
+        self._recent = {}
+
+
+_packed_hashes = _PackedHashCache(FEATURE_HASH_CACHE_SIZE)
+# Shingles with code points beyond the BMP do not pack into 64 bits
+_feature_hashes: Dict[str, int] = {}
+
+
+def _md5_hashes(features: List[str]) -> np.ndarray:
+    cache = _feature_hashes
+    hashes = [cache.get(feature) for feature in features]
+    if None in hashes:
+        if len(cache) > FEATURE_HASH_CACHE_SIZE:
+            cache.clear()
+        for i, value in enumerate(hashes):
+            if value is None:
+                hashes[i] = cache[features[i]] = _md5_hash(features[i])
+    return np.array(hashes, dtype=np.uint64)
+
+
+def _majority_bits(hashes: np.ndarray, weights: np.ndarray, lengths: Sequence[int]) -> np.ndarray:
+    """
+    Combines consecutive runs of `lengths` weighted feature hashes into one
+    fingerprint each: bit i is set when the features with bit i set carry
+    more than half of the run's total weight.
+    """
+    runs = len(lengths)
+    run_ids = np.repeat(np.arange(runs), lengths) * 256
+    # Big-endian bytes, most significant first, like the package's bit order
+    hash_bytes = hashes.astype(">u8").view(np.uint8).reshape(-1, 8)
+    sums = np.empty((runs, 64))
+    for column in range(8):
+        # Weight per (run, byte value), then spread onto that byte's 8 bits
+        histogram = np.bincount(run_ids + hash_bytes[:, column], weights=weights, minlength=runs * 256)
+        sums[:, 8 * column:8 * column + 8] = histogram.reshape(runs, 256) @ _BYTE_BITS
+    totals = np.bincount(run_ids // 256, weights=weights, minlength=runs)
+    majority = 2 * sums > totals[:, None]
+    return np.packbits(majority, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def _shingle_windows(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The package's shingles of every text, as rows of SIMHASH_SHINGLE_WIDTH
+    code points (NUL-padded when a text is shorter), plus the shingle count
+    of each text.
+    """
+    width = SIMHASH_SHINGLE_WIDTH
+    contents = ["".join(SIMHASH_LETTER_REGEX.findall(text.lower())) for text in texts]
+    # NUL never matches the letter pattern, so padding each content with
+    # `width` NULs keeps every shingle, even of a short text, inside its own text
+    padding = "\0" * width
+    codes = np.frombuffer((padding.join(contents) + padding).encode("utf-32-le"), dtype=np.uint32)
+    lengths = np.array([len(content) for content in contents], dtype=np.intp)
+    starts = np.concatenate(([0], np.cumsum(lengths[:-1] + width)))
+    counts = np.maximum(lengths - width + 1, 1)
+    # Start of every shingle: each text's start plus 0 .. count - 1
+    first = np.repeat(starts - np.concatenate(([0], np.cumsum(counts[:-1]))), counts)
+    positions = first + np.arange(counts.sum())
+    return codes[positions[:, None] + np.arange(width)], counts
+
+
+def _decode_shingles(windows: np.ndarray) -> List[str]:
+    # One decode for all rows, then fixed-width slices
+    width = windows.shape[1]
+    decoded = np.ascontiguousarray(windows).tobytes().decode("utf-32-le")
+    features = [decoded[i:i + width] for i in range(0, len(decoded), width)]
+    if "\0" in decoded:
+        features = [feature.rstrip("\0") for feature in features]
+    return features
+
+
+def simhash_text_fingerprints(texts: Sequence[str]) -> np.ndarray:
+    """
+    `Simhash(text).value` for every text, as a uint64 array.
+    """
+    if not texts:
+        return np.zeros(0, dtype=np.uint64)
+    windows, counts = _shingle_windows(texts)
+    if windows.max(initial=0) < 1 << 16:
+        # Four code points of the Basic Multilingual Plane pack exactly into 64 bits
+        keys = np.zeros(len(windows), dtype=np.uint64)
+        for column in range(windows.shape[1]):
+            keys = (keys << np.uint64(16)) | windows[:, column].astype(np.uint64)
+        shingles, first, shingle_ids = np.unique(keys, return_index=True, return_inverse=True)
+        hashes = _packed_hashes.hashes(shingles, lambda positions: _decode_shingles(windows[first[positions]]))
+    else:
+        keys = np.ascontiguousarray(windows).view(np.dtype((np.void, windows.itemsize * windows.shape[1]))).ravel()
+        _, first, shingle_ids = np.unique(keys, return_index=True, return_inverse=True)
+        hashes = _md5_hashes(_decode_shingles(windows[first]))
+    shingle_ids = shingle_ids.ravel()
+    # Every occurrence counts once, which equals weighting each distinct shingle by its count
+    return _majority_bits(hashes[shingle_ids], np.ones(len(shingle_ids)), counts)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer; uint64 arithmetic wraps around
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def fast_simhash_fingerprints(texts: Sequence[str]) -> np.ndarray:
+    """
+    SimHash over the package's shingles of every text, with a vectorized
+    64-bit feature hash instead of MD5.
+    """
+    if not texts:
+        return np.zeros(0, dtype=np.uint64)
+    windows, counts = _shingle_windows(texts)
+    windows = windows.astype(np.uint64)
+    key = np.zeros(len(windows), dtype=np.uint64)
+    for column in range(windows.shape[1]):
+        key = _mix64(key ^ (windows[:, column] + np.uint64(0x9E3779B97F4A7C15)))
+    return _majority_bits(key, np.ones(len(key)), counts)
+
+
+def batch_fingerprints(analyses: Sequence[AnalyzedText], mode: str = "compat") -> np.ndarray:
+    """
+    The SimHash fingerprints of analyzed turns in the given SIMHASH_MODE.
+    """
+    texts = [analyzed.text for analyzed in analyses]
+    if mode == "compat":
+        return simhash_text_fingerprints(texts)
+    if mode == "fast":
+        return fast_simhash_fingerprints(texts)
+    raise ValueError(f"Unknown SimHash mode {mode!r}; choose from {SIMHASH_MODES}")
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the Tier 2 global integrity service, backed by a
+persistent `FingerprintStore` instead of an HTTP call.
+
+    python -m my_proof.tier2_service --store fingerprints/ 123 456 ...
+
+prints the same JSON the remote service returns. With `--serve` it answers
+HTTP instead, for end-to-end runs of the orchestrator without the remote service:
+
+    python -m my_proof.tier2_service --store fingerprints/ --serve --port 8090
+
+    POST /        {"fingerprints": [...]}                      -> one result
+    POST /batch   {"files": [{"fingerprints": [...]}, ...]}    -> {"results": [...]}
+
+Batched files are checked in order, so each one is compared against the
+files before it, as with separate calls.
+"""
+import argparse
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Union
+
+from .config import settings
+from .fingerprint_store import FingerprintStore, open_shared_store
+
+
+class LocalTier2Service:
+    """
+    Scores a batch of fingerprints against every fingerprint seen before,
+    then records them. A fingerprint counts as already seen when the store
+    holds one within `radius` bits (0 = exact matches only).
+    """
+    def __init__(self, store: FingerprintStore, radius: int = 0):
+        self.store = store
+        self.radius = radius
+
+    def check(self, fingerprints: Iterable[Union[int, str]]) -> Dict[str, Any]:
+        fingerprints = list(fingerprints)
+        if not fingerprints:
+            return {"global_uniqueness_score": 1.0, "matched_fingerprints": 0, "total_fingerprints": 0}
+        matched = int(self.store.contains(fingerprints, self.radius).sum())
+        self.store.add(fingerprints)
+        return {
+            "global_uniqueness_score": 1.0 - matched / len(fingerprints),
+            "matched_fingerprints": matched,
+            "total_fingerprints": len(fingerprints),
+        }
+
+    def check_batch(self, batches: Iterable[Iterable[Union[int, str]]]) -> List[Dict[str, Any]]:
+        """One `check` result per fingerprint list, checked in order."""
+        return [self.check(fingerprints) for fingerprints in batches]
+
+
+class Tier2RequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers the remote service's request (POST /) and the batch request
+    (POST /batch) from the server's LocalTier2Service.
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "LocalTier2Service/1.0"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.info(f"{self.client_address[0]} - {format % args}")
+
+    def do_POST(self) -> None:
+        if self.path not in ("/", "/batch"):
+            self._send_json(404, {"error": "Not found"})
+            return
+        api_key = self.server.api_key
+        if api_key and self.headers.get("X-API-KEY") != api_key:
+            self._send_json(401, {"error": "Invalid API key"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with self.server.lock:
+                if self.path == "/batch":
+                    result = {"results": self.server.service.check_batch(
+                        file.get("fingerprints", []) for file in payload["files"])}
+                else:
+                    result = self.server.service.check(payload.get("fingerprints", []))
+        except (ValueError, KeyError, TypeError, OverflowError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+        self._send_json(200, result)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def create_http_server(service: LocalTier2Service, host: str = "127.0.0.1", port: int = 0,
+                       api_key: str = "") -> ThreadingHTTPServer:
+    """
+    Builds an HTTP server for `service`. Requests are answered one at a time,
+    since the store is not safe for concurrent updates.
+    """
+    server = ThreadingHTTPServer((host, port), Tier2RequestHandler)
+    server.service = service
+    server.api_key = api_key
+    server.lock = threading.Lock()
+    return server
+
+
+def create_local_service(directory: str, radius: int = 0) -> LocalTier2Service:
+    store = open_shared_store(directory)
+    return LocalTier2Service(store, min(radius, store.radius))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fingerprints", nargs="*")
+    parser.add_argument("--store", default=settings.FINGERPRINT_STORE_DIR, required=not settings.FINGERPRINT_STORE_DIR)
+    parser.add_argument("--radius", type=int, default=0, help="Hamming radius of a match (0 = exact)")
+    parser.add_argument("--compact", action="store_true", help="Merge the append log into the base files first")
+    parser.add_argument("--serve", action="store_true", help="Answer HTTP requests instead of checking the arguments")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--api-key", default="", help="Require this X-API-KEY header when serving")
+    args = parser.parse_args()
+
+    service = create_local_service(args.store, args.radius)
+    if args.compact:
+        service.store.compact()
+    if not args.serve:
+        print(json.dumps(service.check(args.fingerprints)))
+        return
+
+    server = create_http_server(service, args.host, args.port, args.api_key)
+    logging.info(f"Local Tier 2 service listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Shutting down local Tier 2 service")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,143 +1,331 @@
 import os
 import sys
 import json
-import subprocess
+import asyncio
+import argparse
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Tuple
 
 # --- Configuration ---
 # This should be the name of your Tier 1 Docker image
 TIER_1_DOCKER_IMAGE = "vana-satya-proof:latest"
+# Tier 1 containers running at the same time
+TIER_1_CONCURRENCY = int(os.environ.get("TIER_1_CONCURRENCY", "2"))
+# Seconds a Tier 1 container may run before it is killed
+TIER_1_TIMEOUT_S = float(os.environ.get("TIER_1_TIMEOUT_S", "1800"))
 
 # This is the public URL of your deployed Tier 2 service
-TIER_2_API_URL = "https://global-integrity-service.onrender.com"
+TIER_2_API_URL = os.environ.get("TIER_2_API_URL", "https://global-integrity-service.onrender.com")
+# Endpoint that checks the fingerprints of several files in one call (see
+# `my_proof.tier2_service --serve`); when empty, every file is a separate call
+TIER_2_BATCH_URL = os.environ.get("TIER_2_BATCH_URL", "")
 
 # The secret API key for your Tier 2 service
 TIER_2_API_KEY = os.environ.get("TIER_2_API_KEY", "your-secret-api-key-goes-here")
 
+# Files whose fingerprints are sent in one Tier 2 call at most...
+TIER_2_BATCH_MAX_FILES = int(os.environ.get("TIER_2_BATCH_MAX_FILES", "16"))
+# ...and how long the first file waits for others to join its call
+TIER_2_BATCH_WAIT_MS = float(os.environ.get("TIER_2_BATCH_WAIT_MS", "50"))
+# Retries of a Tier 2 call the service never processed (connection errors and
+# 429 answers), with exponential backoff starting at TIER_2_BACKOFF_S
+TIER_2_RETRIES = int(os.environ.get("TIER_2_RETRIES", "3"))
+TIER_2_BACKOFF_S = float(os.environ.get("TIER_2_BACKOFF_S", "0.5"))
+TIER_2_TIMEOUT_S = float(os.environ.get("TIER_2_TIMEOUT_S", "30"))
+
+# When set, Tier 2 is answered from a local fingerprint store in this directory
+# instead of the HTTP service (offline runs, tests, self-hosted deployments)
+TIER_2_LOCAL_STORE_DIR = os.environ.get("TIER_2_LOCAL_STORE_DIR", "")
+# Hamming radius at which the local store counts a fingerprint as already seen
+TIER_2_LOCAL_RADIUS = int(os.environ.get("TIER_2_LOCAL_RADIUS", "0"))
+
 # --- Score Weighting ---
 # How much each score contributes to the final result
 QUALITY_WEIGHT = 0.6
 GLOBAL_UNIQUENESS_WEIGHT = 0.4
 
 
-def run_tier_1_proof(input_data_path: str) -> Dict[str, Any]:
+def parse_proof_output(stdout: str) -> Dict[str, Any]:
     """
-    Runs the Tier 1 proof in a Docker container.
+    Finds the proof in the Tier 1 container's stdout: the last line that is
+    a JSON object (log lines may come before and after it).
+    """
+    for line in reversed(stdout.splitlines()):
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    raise ValueError("Tier 1 did not print a proof")
+
+
+async def run_tier_1_proof(input_data_path: str, slots: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    Runs the Tier 1 proof in a Docker container, once one of the `slots` is free.
 
     Args:
-        input_data_path: The path to the data.json file.
+        input_data_path: The path to the data file; it is mounted as the container's data.json.
+        slots: Bounds the number of containers running at the same time.
 
     Returns:
-        The parsed JSON output from the Tier 1 proof.
+        The proof the container printed to stdout.
     """
-    print("--- Running Tier 1: Local Data Proof ---")
-    
-    input_dir = os.path.dirname(input_data_path)
-    output_dir = os.path.join(os.getcwd(), "output")
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Docker command to run the proof
     command = [
         "docker", "run", "--rm",
-        "-v", f"{os.path.abspath(input_dir)}:/input",
-        "-v", f"{os.path.abspath(output_dir)}:/output",
+        "-v", f"{os.path.abspath(input_data_path)}:/app/input/data.json:ro",
         TIER_1_DOCKER_IMAGE
     ]
 
-    try:
-        print(f"Executing Docker command: {' '.join(command)}")
-        subprocess.run(command, check=True, capture_output=True, text=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running Tier 1 Docker container.")
-        print(f"Stderr: {e.stderr}")
-        raise
-
-    # Read the results from the output file
-    results_path = os.path.join(output_dir, "results.json")
-    if not os.path.exists(results_path):
-        print("Error: Tier 1 did not produce a results.json file.")
-        raise FileNotFoundError("results.json not found")
-        
-    with open(results_path) as f:
-        tier_1_results = json.load(f)
-        
-    print("Tier 1 Proof Successful.")
-    return tier_1_results
-
-
-def call_tier_2_service(fingerprints: list[str]) -> Dict[str, Any]:
+    async with slots:
+        print(f"[{input_data_path}] Running Tier 1: {' '.join(command)}")
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), TIER_1_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise RuntimeError(f"Tier 1 container timed out after {TIER_1_TIMEOUT_S:.0f}s")
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Tier 1 container exited with {process.returncode}: "
+                           f"{stderr.decode('utf-8', 'replace').strip()[-2000:]}")
+    return parse_proof_output(stdout.decode("utf-8", "replace"))
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    A keep-alive session for Tier 2 calls. Only failures that show the request
+    was not processed are retried, with exponential backoff: connection errors
+    and 429 answers. Tier 2 records the fingerprints it checks, so a repeated
+    call after a read timeout or a 5xx would find the file's own fingerprints.
+    """
+    retry = Retry(total=TIER_2_RETRIES, connect=TIER_2_RETRIES, read=0, other=0, status=TIER_2_RETRIES,
+                  backoff_factor=TIER_2_BACKOFF_S, status_forcelist=(429,), allowed_methods=None,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json", "X-API-KEY": TIER_2_API_KEY})
+    return session
+
+
+def call_tier_2_service(fingerprints: list[str], session: Optional[requests.Session] = None) -> Dict[str, Any]:
     """
     Calls the deployed Tier 2 service to get the global uniqueness score.
 
     Args:
         fingerprints: A list of SimHash fingerprints from Tier 1.
+        session: A session from `create_session`; a new one is used if omitted.
 
     Returns:
         The parsed JSON response from the Tier 2 API.
     """
-    print("\n--- Calling Tier 2: Global Integrity Service ---")
     if not fingerprints:
-        print("No valid fingerprints to send. Skipping.")
         return {"global_uniqueness_score": 1.0} # No data is perfectly unique
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-KEY": TIER_2_API_KEY
-    }
-    payload = {"fingerprints": fingerprints}
-
-    try:
-        response = requests.post(TIER_2_API_URL, headers=headers, json=payload, timeout=30)
-        response.raise_for_status() # Raises an exception for 4xx or 5xx status codes
-    except requests.exceptions.RequestException as e:
-        print(f"Error calling Tier 2 API: {e}")
-        raise
+    if TIER_2_LOCAL_STORE_DIR:
+        return call_local_tier_2([fingerprints])[0]
 
-    print("Tier 2 Call Successful.")
+    session = session or create_session(1)
+    response = session.post(TIER_2_API_URL, json={"fingerprints": fingerprints}, timeout=TIER_2_TIMEOUT_S)
+    response.raise_for_status() # Raises an exception for 4xx or 5xx status codes
     return response.json()
 
 
-def main(data_file_path: str):
+def call_tier_2_batch(batches: List[list[str]], session: requests.Session) -> List[Dict[str, Any]]:
     """
-    The main orchestration function.
+    Gets one Tier 2 result per fingerprint list, in one call when the service
+    has a batch endpoint (or a local store is used), else one call per list.
     """
-    # Step 1: Run Tier 1 Proof
-    tier_1_results = run_tier_1_proof(data_file_path)
-    
-    if not tier_1_results.get("valid"):
-        print("\nTier 1 proof marked the data as invalid. Halting process.")
-        print(f"Reason: {tier_1_results.get('attributes', {}).get('error', 'Unknown')}")
-        return
+    if TIER_2_LOCAL_STORE_DIR:
+        return call_local_tier_2(batches)
+    if not TIER_2_BATCH_URL:
+        return [call_tier_2_service(fingerprints, session) for fingerprints in batches]
+
+    payload = {"files": [{"fingerprints": fingerprints} for fingerprints in batches]}
+    response = session.post(TIER_2_BATCH_URL, json=payload, timeout=TIER_2_TIMEOUT_S)
+    response.raise_for_status()
+    results = response.json()["results"]
+    if len(results) != len(batches):
+        raise ValueError(f"Tier 2 answered {len(results)} results for {len(batches)} files")
+    return results
+
+
+def call_local_tier_2(batches: List[list[str]]) -> List[Dict[str, Any]]:
+    """
+    Answers Tier 2 requests from the local fingerprint store. Returns the
+    same fields as the HTTP service.
+    """
+    from my_proof.tier2_service import create_local_service
+
+    service = create_local_service(TIER_2_LOCAL_STORE_DIR, TIER_2_LOCAL_RADIUS)
+    return service.check_batch(batches)
+
+
+class Tier2Batcher:
+    """
+    Merges the Tier 2 requests of files finishing Tier 1 around the same time
+    into one call. The first waiting request opens a batch that collects
+    further requests for at most `max_wait_ms` or until `max_files` are
+    queued. Batches are sent one after another, so every file is checked
+    against the fingerprints of all files before it.
+    """
+    def __init__(self, session: requests.Session, max_files: int, max_wait_ms: float):
+        self.session = session
+        self.max_files = max(max_files, 1)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[list[str], asyncio.Future]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self, fingerprints: list[str]) -> Dict[str, Any]:
+        if not fingerprints:
+            return {"global_uniqueness_score": 1.0}
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fingerprints, future))
+        return await future
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_files:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                # Blocking HTTP (or store) work runs off the event loop
+                results = await asyncio.to_thread(
+                    call_tier_2_batch, [fingerprints for fingerprints, _ in pending], self.session)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            print(f"Tier 2 checked {len(pending)} file(s) in one call")
+            for (_, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def extract_fingerprints(tier_1_results: Dict[str, Any]) -> list[str]:
+    valid_fingerprints = tier_1_results.get("attributes", {}).get("valid_fingerprints")
+    if valid_fingerprints is None:
+        # The current proof publishes its fingerprints in the metadata, as a
+        # decimal list or in the compact encoding
+        from my_proof.hash_codec import fingerprints_from_metadata
+        valid_fingerprints = fingerprints_from_metadata(tier_1_results.get("metadata", {}))
+    return valid_fingerprints
 
-    # Extract necessary info from Tier 1 results
-    tier_1_quality = tier_1_results.get("quality", 0.0)
-    valid_fingerprints = tier_1_results.get("attributes", {}).get("valid_fingerprints", [])
 
-    # Step 2: Call Tier 2 Service
-    tier_2_results = call_tier_2_service(valid_fingerprints)
-    global_uniqueness = tier_2_results.get("global_uniqueness_score", 0.0)
+async def process_file(data_file_path: str, slots: asyncio.Semaphore, tier_2: Tier2Batcher) -> Dict[str, Any]:
+    """
+    Runs both tiers for one file and returns its summary. Never raises:
+    failures are reported in the summary's `error`, and the reason Tier 1
+    rejected the data in `invalid`.
+    """
+    summary: Dict[str, Any] = {"file": data_file_path}
+    try:
+        # Step 1: Run Tier 1 Proof
+        tier_1_results = await run_tier_1_proof(data_file_path, slots)
+        if not tier_1_results.get("valid"):
+            summary["invalid"] = tier_1_results.get("attributes", {}).get("error", "Unknown")
+            return summary
+
+        # Step 2: Call Tier 2 Service
+        tier_1_quality = tier_1_results.get("quality", 0.0)
+        tier_2_results = await tier_2.check(extract_fingerprints(tier_1_results))
+        global_uniqueness = tier_2_results.get("global_uniqueness_score", 0.0)
+    except Exception as e:
+        summary["error"] = str(e) or type(e).__name__
+        return summary
 
     # Step 3: Calculate the Final Overall Score
-    print("\n--- Calculating Final Overall Score ---")
-    final_score = (tier_1_quality * QUALITY_WEIGHT) + (global_uniqueness * GLOBAL_UNIQUENESS_WEIGHT)
+    summary.update({
+        "tier_1_quality": tier_1_quality,
+        "global_uniqueness": global_uniqueness,
+        "final_score": (tier_1_quality * QUALITY_WEIGHT) + (global_uniqueness * GLOBAL_UNIQUENESS_WEIGHT),
+    })
+    return summary
 
-    print("\n--- VALIDATION COMPLETE ---")
-    print(f"Tier 1 Quality Score: {tier_1_quality:.3f}")
-    print(f"Global Uniqueness Score: {global_uniqueness:.3f}")
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(f"\n--- VALIDATION COMPLETE: {summary['file']} ---")
+    if "invalid" in summary:
+        print("Tier 1 proof marked the data as invalid. Halting process.")
+        print(f"Reason: {summary['invalid']}")
+        return
+    if "error" in summary:
+        print(f"Error: {summary['error']}")
+        return
+    print(f"Tier 1 Quality Score: {summary['tier_1_quality']:.3f}")
+    print(f"Global Uniqueness Score: {summary['global_uniqueness']:.3f}")
     print("---------------------------------")
-    print(f"Final Weighted Score: {final_score:.3f}")
+    print(f"Final Weighted Score: {summary['final_score']:.3f}")
     print("---------------------------------")
 
 
+async def orchestrate(data_file_paths: List[str], concurrency: int = TIER_1_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Validates many files: at most `concurrency` Tier 1 containers run at
+    once, and their Tier 2 checks share pooled connections and batched calls.
+    Summaries are printed as files finish and returned in input order.
+    """
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    session = create_session(pool_size=max(concurrency, 1))
+    tier_2 = Tier2Batcher(session, TIER_2_BATCH_MAX_FILES, TIER_2_BATCH_WAIT_MS)
+
+    async def run(path: str) -> Dict[str, Any]:
+        summary = await process_file(path, slots, tier_2)
+        print_summary(summary)
+        return summary
+
+    try:
+        return await asyncio.gather(*(run(path) for path in data_file_paths))
+    finally:
+        await tier_2.close()
+        session.close()
+
+
+def main(data_file_paths: List[str], concurrency: int = TIER_1_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    The main orchestration function.
+    """
+    return asyncio.run(orchestrate(data_file_paths, concurrency))
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print(f"Usage: python {sys.argv[0]} /path/to/data.json")
+    parser = argparse.ArgumentParser(description="Run Tier 1 and Tier 2 validation for one or more data files.")
+    parser.add_argument("data_files", nargs="+", help="Paths to data.json-style files")
+    parser.add_argument("--concurrency", type=int, default=TIER_1_CONCURRENCY,
+                        help="Tier 1 containers running at the same time")
+    args = parser.parse_args()
+
+    missing = [path for path in args.data_files if not os.path.exists(path)]
+    if missing:
+        print(f"Error: File not found at {', '.join(missing)}")
         sys.exit(1)
-        
-    data_file = sys.argv[1]
-    if not os.path.exists(data_file):
-        print(f"Error: File not found at {data_file}")
+
+    summaries = main(args.data_files, args.concurrency)
+    if any("error" in summary for summary in summaries):
         sys.exit(1)
-        
-    main(data_file)
@@ -0,0 +1,69 @@
+import numpy as np
+
+from my_proof.embedding_cache import EmbeddingCache
+
+DIM = 4
+
+
+def vector(value: float) -> np.ndarray:
+    return np.full((1, DIM), value, dtype=np.float32)
+
+
+def open_cache(directory, **kwargs) -> EmbeddingCache:
+    return EmbeddingCache("test-model", directory=str(directory), max_entries=2, memory_entries=0, **kwargs)
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many(["a"], vector(1.0))
+    cache.flush()
+
+    [cached] = open_cache(tmp_path).get_many(["a"])
+    assert np.array_equal(cached, vector(1.0)[0])
+
+
+def test_full_store_with_stale_index_accepts_writes(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.put_many(["x", "y"], np.concatenate([vector(1.0), vector(2.0)]))
+    cache.flush()
+    # Overwrites both rows without saving the index, as a killed process would
+    cache.put_many(["z", "w"], np.concatenate([vector(3.0), vector(4.0)]))
+
+    reopened = open_cache(tmp_path)
+    assert reopened.get_many(["x", "y"]) == [None, None]
+    reopened.put_many(["v"], vector(5.0))
+
+    [cached] = reopened.get_many(["v"])
+    assert np.array_equal(cached, vector(5.0)[0])
+    reopened.flush()
+    results = open_cache(tmp_path).get_many(["v", "x", "y", "z", "w"])
+    assert np.array_equal(results[0], vector(5.0)[0])
+    # Rows whose index entry is stale or was never saved are misses, never another text's vector
+    assert results[1:] == [None, None, None, None]
+
+
+def test_first_write_creates_the_store_without_failing(tmp_path):
+    cache = open_cache(tmp_path / "cache")
+    cache.put_many(["a"], vector(1.0))
+
+    assert (tmp_path / "cache" / "meta.json").exists()
+    assert (tmp_path / "cache" / "lock").exists()
+
+
+def test_index_is_saved_after_the_flush_interval(tmp_path):
+    cache = open_cache(tmp_path, flush_interval_s=0)
+    cache.put_many(["a"], vector(1.0))
+
+    [cached] = open_cache(tmp_path).get_many(["a"])
+    assert np.array_equal(cached, vector(1.0)[0])
+
+
+def test_disk_errors_do_not_fail_writes(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = EmbeddingCache("test-model", directory=str(tmp_path / "cache"), max_entries=2)
+    cache.directory = str(blocker / "cache")
+    cache.put_many(["a"], vector(1.0))
+
+    [cached] = cache.get_many(["a"])
+    assert np.array_equal(cached, vector(1.0)[0])
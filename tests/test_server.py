@@ -0,0 +1,41 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from my_proof.server import create_server
+
+
+@pytest.fixture
+def server():
+    # Requests rejected before scoring never reach the scorer
+    server = create_server(None, {}, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def post(server, headers):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        connection.putrequest("POST", "/proof", skip_accept_encoding=True)
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders()
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_missing_content_length_is_rejected(server):
+    assert post(server, {}) == (411, {"error": "Content-Length required"})
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", ""])
+def test_invalid_content_length_is_rejected(server, length):
+    assert post(server, {"Content-Length": length}) == (400, {"error": "Invalid Content-Length"})